@@ -0,0 +1,24 @@
+"""
+Shared pytest configuration for the Python agent tests
+
+@license MIT
+"""
+
+import sys
+import os
+
+# Add the parent directory to the path to import the agent modules. pytest loads
+# this once per session (and once per xdist worker) before collecting any test.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# uvloop is optional; when it is installed the pytest-asyncio tests run on it
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
+if UVLOOP_AVAILABLE:
+    def pytest_asyncio_loop_factories(config, item):
+        """Build every pytest-asyncio event loop with uvloop"""
+        return {"uvloop": uvloop.new_event_loop}
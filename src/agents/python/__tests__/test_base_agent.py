@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the Base Python Agent
+
+Covers the stdio side of BaseAgent: reading messages from stdin and the
+messages the framework itself sends back.
+
+@license MIT
+"""
+
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+
+import base_agent
+from base_agent import BaseAgent, CrossLanguageMessage
+
+
+class ProbeAgent(BaseAgent):
+    """Minimal concrete agent for exercising the base class"""
+
+    async def initialize(self):
+        pass
+
+    async def cleanup(self):
+        pass
+
+
+def ping(msg_id: str, **fields) -> dict:
+    """A ping request as the runtime would send it; fields override the defaults"""
+    message = {"id": msg_id, "type": "ping", "source": {"agentId": "runtime"},
+               "destination": {}, "payload": {}, "metadata": {}}
+    message.update(fields)
+    return message
+
+
+def feed(*chunks: bytes) -> asyncio.StreamReader:
+    """StreamReader that yields the given chunks, then EOF"""
+    reader = asyncio.StreamReader()
+    for chunk in chunks:
+        reader.feed_data(chunk)
+    reader.feed_eof()
+    return reader
+
+
+@pytest.fixture
+def agent():
+    """Running probe agent whose encoded output is captured instead of written"""
+    agent = ProbeAgent("probe", "probe", "1.0.0")
+    agent.is_running = True
+    agent.written = []
+    agent._emit = agent.written.append
+    return agent
+
+
+def decoded(agent) -> list:
+    """Every message the agent emitted, parsed back from JSON"""
+    return [json.loads(data) for data in agent.written]
+
+
+async def test_bad_line_does_not_drop_rest_of_batch(agent):
+    """A malformed message is skipped; the rest of the same read is still handled"""
+    lines = [
+        json.dumps(ping("1")),
+        json.dumps({k: v for k, v in ping("2").items() if k != "source"}),
+        "not json",
+        json.dumps(ping("3")),
+        json.dumps(ping("4")),
+    ]
+    agent._stdin_reader = feed(("\n".join(lines) + "\n").encode())
+
+    await agent.message_loop()
+
+    pongs = [m["payload"]["original_message_id"] for m in decoded(agent) if m["type"] == "pong"]
+    assert pongs == ["1", "3", "4"]
+    assert agent.message_count == 3
+    assert agent.error_count == 2
+
+
+def make_request(msg_type: str, msg_id: str = "req_1") -> CrossLanguageMessage:
+    """A request from the runtime to the probe agent"""
+    return CrossLanguageMessage.from_dict(dict(ping(msg_id), type=msg_type))
+
+
+FRAMEWORK_REPLIES = [
+    ("ping", "pong"),
+    ("get_status", "status_response"),
+    ("heartbeat_request", "heartbeat"),
+    ("no_such_type", "error"),
+]
+
+
+@pytest.mark.parametrize("request_type, reply_type", FRAMEWORK_REPLIES)
+async def test_framework_replies_reach_instance_send_message(agent, request_type, reply_type):
+    """A send_message replaced on the instance sees the framework's own replies"""
+    sent = []
+
+    async def sink(message):
+        sent.append(message)
+
+    agent.send_message = sink
+    await agent.process_message(make_request(request_type))
+
+    assert [message.type for message in sent] == [reply_type]
+    assert agent.written == []
+
+
+async def test_framework_replies_reach_subclass_send_message():
+    """A subclass overriding send_message sees the framework's own replies"""
+    class RecordingAgent(ProbeAgent):
+        async def send_message(self, message):
+            self.sent.append(message)
+
+    agent = RecordingAgent("recorder", "recorder", "1.0.0")
+    agent.sent = []
+    for request_type, _ in FRAMEWORK_REPLIES:
+        await agent.process_message(make_request(request_type))
+
+    assert [message.type for message in agent.sent] == [reply for _, reply in FRAMEWORK_REPLIES]
+
+
+def frame(message: dict) -> bytes:
+    """A message encoded for the framed protocol"""
+    body = json.dumps(message).encode()
+    return len(body).to_bytes(4, "little") + body
+
+
+def unframe(data: bytes) -> list:
+    """Parse a stream of framed messages; fails on a truncated frame"""
+    messages = []
+    while data:
+        size = int.from_bytes(data[:4], "little")
+        body = data[4:4 + size]
+        assert len(body) == size, "truncated frame"
+        messages.append(json.loads(body))
+        data = data[4 + size:]
+    return messages
+
+
+@pytest.fixture
+def framed_agent(monkeypatch):
+    """Running probe agent speaking the length-prefixed protocol; stdout is captured"""
+    monkeypatch.setattr(base_agent, "FRAMED_PROTOCOL", True)
+    agent = ProbeAgent("probe", "probe", "1.0.0")
+    agent.is_running = True
+    agent.stdout = bytearray()
+    agent._write_stdout = agent.stdout.extend
+    return agent
+
+
+async def trickle(reader: asyncio.StreamReader, data: bytes, cuts: list):
+    """Feed data to the reader in pieces split at the given offsets, yielding between them"""
+    start = 0
+    for cut in cuts + [len(data)]:
+        reader.feed_data(data[start:cut])
+        start = cut
+        await asyncio.sleep(0)
+
+
+async def test_framed_round_trip(framed_agent):
+    """Framed requests are read whole, even when split across reads, and replies are framed"""
+    data = b"".join(frame(ping(str(i))) for i in range(3))
+    reader = asyncio.StreamReader()
+    framed_agent._stdin_reader = reader
+
+    async def feed_then_close():
+        # Split inside the first header, inside the second body and between frames
+        first = len(frame(ping("0")))
+        await trickle(reader, data, [2, first + 10, 2 * first])
+        reader.feed_eof()
+
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(framed_agent.message_loop())
+        tg.create_task(feed_then_close())
+
+    replies = unframe(bytes(framed_agent.stdout))
+    assert [reply["payload"]["original_message_id"] for reply in replies] == ["0", "1", "2"]
+
+
+@pytest.mark.parametrize("tail", [b"\x10\x00", frame(ping("x"))[:-3]], ids=["header", "body"])
+async def test_framed_eof_mid_frame_ends_loop(framed_agent, tail):
+    """EOF partway through a frame ends the loop after the complete frames before it"""
+    framed_agent._stdin_reader = feed(frame(ping("1")) + tail)
+
+    await framed_agent.message_loop()
+
+    replies = unframe(bytes(framed_agent.stdout))
+    assert [reply["payload"]["original_message_id"] for reply in replies] == ["1"]
+    assert framed_agent.error_count == 0
+
+
+async def test_framed_read_returns_none_at_eof(framed_agent):
+    """read_stdin_frame gives each body in turn, then None once stdin is exhausted"""
+    framed_agent._stdin_reader = feed(frame({"a": 1}), frame({"b": 2}))
+
+    assert json.loads(await framed_agent.read_stdin_frame()) == {"a": 1}
+    assert json.loads(await framed_agent.read_stdin_frame()) == {"b": 2}
+    assert await framed_agent.read_stdin_frame() is None
+
+
+async def test_read_stdin_messages_reassembles_split_lines(agent):
+    """A line split across reads comes out whole, and a final unterminated line is kept"""
+    reader = asyncio.StreamReader()
+    agent._stdin_reader = reader
+
+    reader.feed_data(b'{"n": 1}\n{"n": ')
+    assert [bytes(line) for line in await agent.read_stdin_messages()] == [b'{"n": 1}']
+
+    reader.feed_data(b'2}\n{"n": 3}')
+    assert [bytes(line) for line in await agent.read_stdin_messages()] == [b'{"n": 2}']
+
+    reader.feed_eof()
+    assert [bytes(line) for line in await agent.read_stdin_messages()] == [b'{"n": 3}']
+    assert await agent.read_stdin_messages() is None
+
+
+async def test_read_stdin_messages_spans_chunk_size(agent, monkeypatch):
+    """Lines longer than one read are buffered until their newline arrives"""
+    monkeypatch.setattr(base_agent, "STDIN_READ_SIZE", 8)
+    lines = [json.dumps(ping(str(i))).encode() for i in range(3)]
+    agent._stdin_reader = feed(b"\n".join(lines))
+
+    received = []
+    while (batch := await agent.read_stdin_messages()) is not None:
+        received.extend(bytes(line) for line in batch)
+
+    assert received == lines
+
+
+async def test_writer_flushes_queued_messages_in_order_on_close():
+    """Everything queued before start() returns reaches stdout, in order and coalesced"""
+    agent = ProbeAgent("probe", "probe", "1.0.0")
+    writes = []
+    agent._write_stdout = writes.append
+
+    async def burst(message):
+        # Queue several messages and stop in the same step, so they are still
+        # waiting on the writer when start() reaches its finally block
+        for i in range(5):
+            await agent.send_dict("status", f"burst_{i}", message.source, {}, {})
+        agent.is_running = False
+
+    agent.register_handler("burst", burst)
+
+    async def open_stdin_reader():
+        lines = [json.dumps(ping(str(i))) for i in range(3)] + [json.dumps(ping("b", type="burst"))]
+        agent._stdin_reader = feed(("\n".join(lines) + "\n").encode())
+
+    agent._open_stdin_reader = open_stdin_reader
+    await agent.start()
+    await agent.stop()
+
+    types = [json.loads(line)["type"] for data in writes for line in data.splitlines()]
+    assert types == (["agent_ready"] + ["pong"] * 3 + [f"burst_{i}" for i in range(5)]
+                     + ["agent_goodbye"])
+    # The pongs and the burst are each handled without yielding, so the writer
+    # gets them in far fewer writes than messages
+    assert len(writes) < len(types) - 1
+    assert agent._writer_task is None and agent._outbound is None
+
+
+@pytest.mark.parametrize("use_orjson", [
+    pytest.param(True, marks=pytest.mark.skipif(not base_agent.ORJSON_AVAILABLE, reason="orjson not installed")),
+    False,
+], ids=["orjson", "json"])
+@pytest.mark.parametrize("agent_id", ["probe", 'we"ird\\id\n✓'], ids=["plain", "escaped"])
+async def test_heartbeat_template_matches_encoded_message(monkeypatch, use_orjson, agent_id):
+    """The spliced heartbeat parses to the same message the encoder would produce"""
+    monkeypatch.setattr(base_agent, "ORJSON_AVAILABLE", use_orjson)
+    agent = ProbeAgent(agent_id, "probe", "1.0.0")
+    agent.message_count, agent.error_count = 12, 3
+    writes = []
+    agent._emit = writes.append
+
+    await agent.send_heartbeat()
+
+    assert len(writes) == 1 and writes[0].endswith(b"\n")
+    heartbeat = json.loads(writes[0])
+    assert heartbeat == {
+        "id": f"heartbeat_{agent_id}_1",
+        "timestamp": heartbeat["timestamp"],
+        "type": "heartbeat",
+        "source": {"agentId": agent_id, "language": "python", "runtime": "python3"},
+        "destination": {"broadcast": True},
+        "payload": {
+            "status": "healthy",
+            "uptime": heartbeat["payload"]["uptime"],
+            "message_count": 12,
+            "error_count": 3
+        },
+        "metadata": base_agent._META_LOW
+    }
+    assert isinstance(heartbeat["payload"]["uptime"], float)
+    assert datetime.fromisoformat(heartbeat["timestamp"])
+
+
+def test_from_dict_keeps_sender_timestamp():
+    """An inbound message keeps the timestamp its sender stamped on it"""
+    data = dict(ping("1"), timestamp="2024-01-15T10:30:00.000Z")
+
+    message = CrossLanguageMessage.from_dict(data)
+
+    assert message.timestamp == data["timestamp"]
+    assert message.to_dict() == data
+
+
+def test_from_dict_stamps_message_without_timestamp():
+    """A message sent without a timestamp is stamped on arrival"""
+    message = CrossLanguageMessage.from_dict(ping("1"))
+
+    assert datetime.fromisoformat(message.timestamp)
+
+
+def test_from_dict_rejects_missing_fields():
+    """Missing required fields raise a ValueError naming them"""
+    data = {k: v for k, v in ping("1").items() if k not in ("source", "payload")}
+
+    with pytest.raises(ValueError, match="missing required fields: source, payload"):
+        CrossLanguageMessage.from_dict(data)
+
+
+async def test_get_status_is_awaitable_and_overridable():
+    """get_status stays a coroutine, and status replies use a subclass override"""
+    class CustomStatusAgent(ProbeAgent):
+        async def get_status(self):
+            status = await super().get_status()
+            status["custom"] = True
+            return status
+
+    agent = CustomStatusAgent("custom", "custom", "1.0.0")
+    sent = []
+    agent._emit = sent.append
+
+    status = await agent.get_status()
+    assert status["agent_id"] == "custom" and status["custom"] is True
+    assert (await agent.get_statistics())["custom"] is True
+
+    await agent.process_message(make_request("get_status"))
+    assert json.loads(sent[0])["payload"]["custom"] is True
@@ -12,239 +12,285 @@ Comprehensive test suite for the NOAA weather service integration including:
 @license MIT
 """
 
+import pytest
+import pytest_asyncio
+import aiohttp
 import asyncio
 import json
-import sys
-import os
+from dataclasses import asdict, replace
 from datetime import datetime, timezone
-from unittest.mock import AsyncMock, MagicMock, patch
-from typing import Dict, Any, List
-
-# Add the parent directory to the path to import the agent modules
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from itertools import repeat
+from unittest.mock import patch
+from types import MappingProxyType
+from typing import Dict, Any, List, Tuple, Final
 
 from noaa_weather_service import (
     NOAAWeatherService,
     NOAALocation,
     NOAAWeatherReading,
     NOAAAlert,
+    IJSON_AVAILABLE,
     geocode_city_state
 )
 from weather_monitoring_agent import WeatherMonitoringAgent
 from base_agent import CrossLanguageMessage
 
-class SimpleTestRunner:
-    def __init__(self):
-        self.tests_run = 0
-        self.tests_passed = 0
-        self.tests_failed = 0
-    
-    def assert_true(self, condition, message="Assertion failed"):
-        self.tests_run += 1
-        if condition:
-            self.tests_passed += 1
-            print(f"✅ PASS: {message}")
-        else:
-            self.tests_failed += 1
-            print(f"❌ FAIL: {message}")
-    
-    def assert_equal(self, actual, expected, message="Values not equal"):
-        self.tests_run += 1
-        if actual == expected:
-            self.tests_passed += 1
-            print(f"✅ PASS: {message}")
-        else:
-            self.tests_failed += 1
-            print(f"❌ FAIL: {message} (expected: {expected}, actual: {actual})")
-    
-    def assert_not_none(self, value, message="Value is None"):
-        self.tests_run += 1
-        if value is not None:
-            self.tests_passed += 1
-            print(f"✅ PASS: {message}")
-        else:
-            self.tests_failed += 1
-            print(f"❌ FAIL: {message}")
-    
-    def assert_in(self, item, container, message="Item not in container"):
-        self.tests_run += 1
-        if item in container:
-            self.tests_passed += 1
-            print(f"✅ PASS: {message}")
-        else:
-            self.tests_failed += 1
-            print(f"❌ FAIL: {message}")
-    
-    def print_summary(self):
-        print(f"\n📊 Test Results:")
-        print(f"   Tests run: {self.tests_run}")
-        print(f"   Passed: {self.tests_passed}")
-        print(f"   Failed: {self.tests_failed}")
-        if self.tests_failed == 0:
-            print("🎉 All tests passed!")
-            return True
-        else:
-            print("💥 Some tests failed!")
-            return False
+# Invariant parts of the test requests; handlers only read them
+_JS_SOURCE: Final[Dict[str, str]] = {"agentId": "test_requester", "language": "javascript", "runtime": "nodejs"}
+_DEFAULT_META: Final = MappingProxyType({"priority": "normal", "retryCount": 0, "maxRetries": 0, "timeoutMs": 5000})
 
-class MockNOAAResponse:
-    """Mock NOAA API responses for testing"""
-    
-    @staticmethod
-    def get_points_response():
-        """Mock response for /points endpoint"""
-        return {
-            "properties": {
-                "gridId": "BOI",
-                "gridX": 73,
-                "gridY": 87,
-                "cwa": "BOI",
-                "relativeLocation": {
-                    "properties": {
-                        "city": "Boise",
-                        "state": "ID"
-                    }
+# Canned NOAA API payloads keyed by endpoint, built once at import. Tests only
+# read them, so MockNOAAResponse.build() hands out the shared objects.
+_RESPONSES: Final[Dict[str, Dict[str, Any]]] = {
+    # /points
+    "points": {
+        "properties": {
+            "gridId": "BOI",
+            "gridX": 73,
+            "gridY": 87,
+            "cwa": "BOI",
+            "forecastZone": "https://api.weather.gov/zones/forecast/IDZ012",
+            "relativeLocation": {
+                "properties": {
+                    "city": "Boise",
+                    "state": "ID"
                 }
             }
         }
-    
-    @staticmethod
-    def get_gridpoint_response():
-        """Mock response for /gridpoints endpoint"""
-        return {
-            "properties": {
-                "temperature": {
-                    "values": [{"value": 20.0}]  # 20°C = 68°F
-                },
-                "relativeHumidity": {
-                    "values": [{"value": 65.0}]
-                },
-                "windSpeed": {
-                    "values": [{"value": 5.0}]  # 5 m/s
-                },
-                "windDirection": {
-                    "values": [{"value": 270.0}]  # West
-                },
-                "pressure": {
-                    "values": [{"value": 101325.0}]  # Pa
+    },
+    # /gridpoints
+    "gridpoint": {
+        "properties": {
+            "temperature": {
+                "values": [{"value": 20.0}]  # 20°C = 68°F
+            },
+            "relativeHumidity": {
+                "values": [{"value": 65.0}]
+            },
+            "windSpeed": {
+                "values": [{"value": 5.0}]  # 5 m/s
+            },
+            "windDirection": {
+                "values": [{"value": 270.0}]  # West
+            },
+            "pressure": {
+                "values": [{"value": 101325.0}]  # Pa
+            },
+            "visibility": {
+                "values": [{"value": 16093.44}]  # 10 miles in meters
+            }
+        }
+    },
+    # /gridpoints/.../forecast
+    "forecast": {
+        "properties": {
+            "periods": [
+                {
+                    "name": "This Afternoon",
+                    "startTime": "2024-01-15T14:00:00-07:00",
+                    "shortForecast": "Partly Cloudy",
+                    "detailedForecast": "Partly cloudy with a high near 68 degrees."
+                }
+            ]
+        }
+    },
+    # /gridpoints/.../forecast/hourly
+    "hourly": {
+        "properties": {
+            "periods": [
+                {
+                    "startTime": "2024-01-15T14:00:00-07:00",
+                    "temperature": 68,
+                    "windSpeed": "5 mph",
+                    "windDirection": "W",
+                    "shortForecast": "Partly Cloudy",
+                    "detailedForecast": "Partly cloudy conditions."
                 },
-                "visibility": {
-                    "values": [{"value": 16093.44}]  # 10 miles in meters
+                {
+                    "startTime": "2024-01-15T15:00:00-07:00",
+                    "temperature": 70,
+                    "windSpeed": "7 mph",
+                    "windDirection": "NW",
+                    "shortForecast": "Sunny",
+                    "detailedForecast": "Sunny skies."
                 }
-            }
+            ]
         }
-    
-    @staticmethod
-    def get_forecast_response():
-        """Mock response for /gridpoints/.../forecast endpoint"""
-        return {
-            "properties": {
-                "periods": [
-                    {
-                        "name": "This Afternoon",
-                        "startTime": "2024-01-15T14:00:00-07:00",
-                        "shortForecast": "Partly Cloudy",
-                        "detailedForecast": "Partly cloudy with a high near 68 degrees."
+    },
+    # /alerts
+    "alerts": {
+        "features": [
+            {
+                "properties": {
+                    "id": "urn:oid:2.49.0.1.840.0.abc123",
+                    "event": "Heat Advisory",
+                    "severity": "Moderate",
+                    "certainty": "Likely",
+                    "urgency": "Expected",
+                    "headline": "Heat Advisory in effect from 12 PM to 8 PM MDT",
+                    "description": "Temperatures up to 100 degrees expected.",
+                    "instruction": "Drink plenty of fluids and stay in air conditioning.",
+                    "areaDesc": "Ada County; Canyon County",
+                    "effective": "2024-01-15T12:00:00-07:00",
+                    "expires": "2024-01-15T20:00:00-07:00",
+                    "senderName": "NWS Boise ID",
+                    "status": "Actual",
+                    "messageType": "Alert",
+                    "geocode": {
+                        "UGC": ["IDZ012", "IDZ014"]
                     }
-                ]
+                }
             }
-        }
+        ]
+    }
+}
+
+class MockNOAAResponse:
+    """Mock NOAA API responses for testing"""
     
     @staticmethod
-    def get_hourly_forecast_response():
-        """Mock response for /gridpoints/.../forecast/hourly endpoint"""
-        return {
-            "properties": {
-                "periods": [
-                    {
-                        "startTime": "2024-01-15T14:00:00-07:00",
-                        "temperature": 68,
-                        "windSpeed": "5 mph",
-                        "windDirection": "W",
-                        "shortForecast": "Partly Cloudy",
-                        "detailedForecast": "Partly cloudy conditions."
-                    },
-                    {
-                        "startTime": "2024-01-15T15:00:00-07:00",
-                        "temperature": 70,
-                        "windSpeed": "7 mph",
-                        "windDirection": "NW",
-                        "shortForecast": "Sunny",
-                        "detailedForecast": "Sunny skies."
-                    }
-                ]
-            }
-        }
+    def build(kind: str) -> Dict[str, Any]:
+        """Mock response for an endpoint: points, gridpoint, forecast, hourly or alerts"""
+        return _RESPONSES[kind]
+
+# Shared NOAA model fixtures. Nothing under test mutates them, so one instance
+# serves every test.
+_MOCK_LOCATION: Final = NOAALocation(43.6150, -116.2023, "BOI", 73, 87, "BOI", "Boise", "ID")
+
+_MOCK_WEATHER: Final = NOAAWeatherReading(
+    timestamp="2024-01-15T14:00:00Z",
+    temperature_f=72.5,
+    humidity_percent=58.0,
+    wind_speed_mph=8.5,
+    wind_direction="NW",
+    pressure_mb=1013.2,
+    visibility_miles=10.0,
+    conditions="Clear",
+    detailed_forecast="Clear skies."
+)
+
+_HEAT_ADVISORY: Final = NOAAAlert(
+    alert_id="test_alert",
+    event="Heat Advisory",
+    severity="Moderate",
+    certainty="Likely",
+    urgency="Expected",
+    headline="Heat Advisory",
+    description="Hot weather",
+    instruction="Stay cool",
+    areas=["Ada County"],
+    effective="2024-01-15T12:00:00Z",
+    expires="2024-01-15T20:00:00Z",
+    sender="NWS",
+    status="Actual",
+    message_type="Alert"
+)
+
+_WINTER_ADVISORY: Final = NOAAAlert(
+    alert_id="handler_test_alert",
+    event="Winter Weather Advisory",
+    severity="Minor",
+    certainty="Likely",
+    urgency="Expected",
+    headline="Snow expected",
+    description="Light snow possible",
+    instruction="Drive carefully",
+    areas=["Ada County"],
+    effective="2024-01-15T18:00:00Z",
+    expires="2024-01-16T06:00:00Z",
+    sender="NWS",
+    status="Actual",
+    message_type="Alert"
+)
+
+# Alerts handed back by a mocked get_active_alerts(); tests pass the agent a
+# fresh list so it never holds on to this tuple
+_DEFAULT_ALERTS: Final[Tuple[NOAAAlert, ...]] = (_HEAT_ADVISORY,)
+
+def collecting_async(sink: List[Any]):
+    """Plain coroutine that stands in for send_message and records every message"""
+    async def _collect(message, *args, **kwargs):
+        sink.append(message)
+    return _collect
+
+class StubNOAA:
+    """Plain stand-in for NOAAWeatherService that serves canned data"""
     
-    @staticmethod
-    def get_alerts_response():
-        """Mock response for /alerts endpoint"""
-        return {
-            "features": [
-                {
-                    "properties": {
-                        "id": "urn:oid:2.49.0.1.840.0.abc123",
-                        "event": "Heat Advisory",
-                        "severity": "Moderate",
-                        "certainty": "Likely",
-                        "urgency": "Expected",
-                        "headline": "Heat Advisory in effect from 12 PM to 8 PM MDT",
-                        "description": "Temperatures up to 100 degrees expected.",
-                        "instruction": "Drink plenty of fluids and stay in air conditioning.",
-                        "areaDesc": "Ada County; Canyon County",
-                        "effective": "2024-01-15T12:00:00-07:00",
-                        "expires": "2024-01-15T20:00:00-07:00",
-                        "senderName": "NWS Boise ID",
-                        "status": "Actual",
-                        "messageType": "Alert"
-                    }
-                }
-            ]
-        }
+    def __init__(self, location=_MOCK_LOCATION, weather=_MOCK_WEATHER, alerts=_DEFAULT_ALERTS):
+        self.location = location
+        self.weather = weather
+        self.alerts = alerts
+    
+    async def initialize(self):
+        pass
+    
+    async def close(self):
+        pass
+    
+    async def get_location_info(self, latitude, longitude):
+        return self.location
+    
+    async def get_current_weather(self, location):
+        return self.weather
+    
+    async def get_active_alerts(self, latitude, longitude, area_filter=None):
+        return list(self.alerts)
+
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def shared_connector():
+    """One TCP connector shared by every NOAA service built in this module"""
+    connector = aiohttp.TCPConnector(limit=0)
+    yield connector
+    await connector.close()
+
+@pytest_asyncio.fixture(loop_scope="module")
+async def service(shared_connector):
+    """NOAA service whose session rides on the shared connector"""
+    async with NOAAWeatherService(connector=shared_connector) as service:
+        yield service
 
 async def test_noaa_service_initialization():
     """Test NOAA service initialization and configuration"""
-    print("\n🌐 Testing NOAA Service Initialization...")
-    test = SimpleTestRunner()
-    
     # Test service creation
     service = NOAAWeatherService("TestAgent/1.0 (test@example.com)")
-    test.assert_equal(service.base_url, "https://api.weather.gov", "Base URL set correctly")
-    test.assert_equal(service.user_agent, "TestAgent/1.0 (test@example.com)", "User agent set correctly")
-    test.assert_true(service.session is None, "Session not initialized yet")
+    assert service.base_url == "https://api.weather.gov"
+    assert service.user_agent == "TestAgent/1.0 (test@example.com)"
+    assert service.session is None
     
     # Test async context manager
     async with NOAAWeatherService() as service:
-        test.assert_not_none(service.session, "Session initialized in context manager")
-    
-    return test.print_summary()
+        assert service.session is not None
+        # The owned connection pool is sized to the request concurrency cap
+        assert service.session.connector.limit == service.concurrency == 5
+        assert service.session.connector.limit_per_host == 5
 
-async def test_geocoding_functionality():
+@pytest.mark.asyncio(loop_scope="module")
+async def test_noaa_service_shared_connector(shared_connector):
+    """Test that closing a service leaves a caller-owned connector open"""
+    async with NOAAWeatherService(connector=shared_connector) as service:
+        assert service.session.connector is shared_connector
+    
+    assert service.session is None
+    assert not shared_connector.closed
+
+def test_geocoding_functionality():
     """Test city geocoding functionality"""
-    print("\n📍 Testing Geocoding Functionality...")
-    test = SimpleTestRunner()
-    
     # Test known cities
     boise_coords = geocode_city_state("Boise", "ID")
-    test.assert_not_none(boise_coords, "Boise coordinates found")
-    test.assert_equal(boise_coords[0], 43.6150, "Boise latitude correct")
-    test.assert_equal(boise_coords[1], -116.2023, "Boise longitude correct")
+    assert boise_coords is not None
+    assert boise_coords[0] == 43.6150
+    assert boise_coords[1] == -116.2023
     
     # Test case insensitive
     seattle_coords = geocode_city_state("SEATTLE", "wa")
-    test.assert_not_none(seattle_coords, "Seattle coordinates found (case insensitive)")
+    assert seattle_coords is not None
     
     # Test unknown city
     unknown_coords = geocode_city_state("Unknown", "ZZ")
-    test.assert_true(unknown_coords is None, "Unknown city returns None")
-    
-    return test.print_summary()
+    assert unknown_coords is None
 
-async def test_noaa_data_structures():
+def test_noaa_data_structures():
     """Test NOAA data structure creation and serialization"""
-    print("\n📊 Testing NOAA Data Structures...")
-    test = SimpleTestRunner()
-    
     # Test NOAALocation
     location = NOAALocation(
         latitude=43.6150,
@@ -258,9 +304,10 @@ async def test_noaa_data_structures():
     )
     
     location_dict = location.to_dict()
-    test.assert_true(isinstance(location_dict, dict), "Location serializes to dict")
-    test.assert_equal(location_dict['city'], "Boise", "City preserved in serialization")
-    test.assert_equal(location_dict['grid_id'], "BOI", "Grid ID preserved")
+    assert isinstance(location_dict, dict)
+    assert location_dict['city'] == "Boise"
+    assert location_dict['grid_id'] == "BOI"
+    assert location_dict == asdict(location)
     
     # Test NOAAWeatherReading
     reading = NOAAWeatherReading(
@@ -276,9 +323,10 @@ async def test_noaa_data_structures():
     )
     
     reading_dict = reading.to_dict()
-    test.assert_true(isinstance(reading_dict, dict), "Reading serializes to dict")
-    test.assert_equal(reading_dict['temperature_f'], 68.0, "Temperature preserved")
-    test.assert_equal(reading_dict['source'], "NOAA", "Source set to NOAA")
+    assert isinstance(reading_dict, dict)
+    assert reading_dict['temperature_f'] == 68.0
+    assert reading_dict['source'] == "NOAA"
+    assert reading_dict == asdict(reading)
     
     # Test NOAAAlert
     alert = NOAAAlert(
@@ -299,146 +347,286 @@ async def test_noaa_data_structures():
     )
     
     alert_dict = alert.to_dict()
-    test.assert_true(isinstance(alert_dict, dict), "Alert serializes to dict")
-    test.assert_equal(alert_dict['event'], "Heat Advisory", "Event preserved")
-    test.assert_equal(len(alert_dict['areas']), 2, "Areas list preserved")
-    
-    return test.print_summary()
+    assert isinstance(alert_dict, dict)
+    assert alert_dict['event'] == "Heat Advisory"
+    assert len(alert_dict['areas']) == 2
+    assert alert_dict == asdict(alert)
+    assert alert_dict['areas'] is not alert.areas
 
-async def test_noaa_api_requests():
-    """Test NOAA API request handling with mocked responses"""
-    print("\n🔗 Testing NOAA API Requests...")
-    test = SimpleTestRunner()
+def _fake_request(responses, requested_urls=None):
+    """Build a plain coroutine that stands in for NOAAWeatherService._make_request
+
+    Responses are handed out in call order. When a list is supplied, requested
+    URLs are recorded in it so tests can still check how often the API was hit.
+    """
+    replies = iter(responses)
     
-    async with NOAAWeatherService() as service:
-        # Mock the _make_request method
-        service._make_request = AsyncMock()
-        
-        # Test location info request
-        service._make_request.return_value = MockNOAAResponse.get_points_response()
+    async def _make_request(url):
+        if requested_urls is not None:
+            requested_urls.append(url)
+        return next(replies)
+    
+    return _make_request
+
+async def _request_endpoint(service, endpoint):
+    """Call the service method behind an endpoint and summarize the parsed result"""
+    if endpoint == "points":
         location = await service.get_location_info(43.6150, -116.2023)
-        
-        test.assert_not_none(location, "Location info retrieved")
-        test.assert_equal(location.city, "Boise", "City parsed correctly")
-        test.assert_equal(location.grid_id, "BOI", "Grid ID parsed correctly")
-        test.assert_equal(location.grid_x, 73, "Grid X parsed correctly")
-        
-        # Verify caching
-        cached_location = await service.get_location_info(43.6150, -116.2023)
-        test.assert_equal(location.city, cached_location.city, "Location cached correctly")
-        
-        # Test current weather request
-        service._make_request.side_effect = [
-            MockNOAAResponse.get_gridpoint_response(),
-            MockNOAAResponse.get_forecast_response()
-        ]
-        
-        weather = await service.get_current_weather(location)
-        test.assert_not_none(weather, "Weather data retrieved")
-        test.assert_equal(weather.temperature_f, 68.0, "Temperature converted correctly")
-        test.assert_equal(weather.wind_direction, "W", "Wind direction parsed correctly")
-        test.assert_equal(weather.conditions, "Partly Cloudy", "Conditions parsed correctly")
-        
-        # Test hourly forecast request
-        service._make_request.return_value = MockNOAAResponse.get_hourly_forecast_response()
-        forecast = await service.get_hourly_forecast(location, hours=2)
-        
-        test.assert_equal(len(forecast), 2, "Correct number of forecast periods")
-        test.assert_equal(forecast[0].temperature_f, 68, "First period temperature correct")
-        test.assert_equal(forecast[1].temperature_f, 70, "Second period temperature correct")
-        
-        # Test alerts request
-        service._make_request.return_value = MockNOAAResponse.get_alerts_response()
+        return {
+            "city": location.city,
+            "grid_id": location.grid_id,
+            "grid_x": location.grid_x,
+            "forecast_zone": location.forecast_zone
+        }
+    
+    if endpoint == "gridpoint":
+        weather = await service.get_current_weather(_MOCK_LOCATION)
+        return {
+            "temperature_f": weather.temperature_f,
+            "wind_direction": weather.wind_direction,
+            "conditions": weather.conditions
+        }
+    
+    if endpoint == "hourly":
+        forecast = await service.get_hourly_forecast(_MOCK_LOCATION, hours=2)
+        return {"temperatures": [period.temperature_f for period in forecast]}
+    
+    if endpoint == "alerts":
         alerts = await service.get_active_alerts(43.6150, -116.2023)
-        
-        test.assert_equal(len(alerts), 1, "Correct number of alerts")
-        test.assert_equal(alerts[0].event, "Heat Advisory", "Alert event parsed correctly")
-        test.assert_equal(alerts[0].severity, "Moderate", "Alert severity parsed correctly")
-        test.assert_in("Ada County", alerts[0].areas, "Alert areas parsed correctly")
+        return {
+            "events": [alert.event for alert in alerts],
+            "severities": [alert.severity for alert in alerts],
+            "areas": alerts[0].areas
+        }
+    
+    raise ValueError(f"Unknown endpoint: {endpoint}")
+
+@pytest.mark.asyncio(loop_scope="module")
+@pytest.mark.parametrize("endpoint,mock,expected", [
+    (
+        "points",
+        [MockNOAAResponse.build("points")],
+        {"city": "Boise", "grid_id": "BOI", "grid_x": 73, "forecast_zone": "IDZ012"}
+    ),
+    (
+        "gridpoint",
+        [MockNOAAResponse.build("gridpoint"), MockNOAAResponse.build("forecast")],
+        {"temperature_f": 68.0, "wind_direction": "W", "conditions": "Partly Cloudy"}
+    ),
+    (
+        "hourly",
+        [MockNOAAResponse.build("hourly")],
+        {"temperatures": [68, 70]}
+    ),
+    (
+        "alerts",
+        [MockNOAAResponse.build("alerts")],
+        {"events": ["Heat Advisory"], "severities": ["Moderate"], "areas": ["Ada County", "Canyon County"]}
+    ),
+])
+async def test_noaa_api_requests(service, endpoint, mock, expected):
+    """Test NOAA API request handling with mocked responses"""
+    # Stub the _make_request method with the endpoint's responses in call order
+    requested_urls = []
+    service._make_request = _fake_request(mock, requested_urls)
+    
+    assert await _request_endpoint(service, endpoint) == expected
+    assert len(requested_urls) == len(mock)
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_noaa_alerts_bulk(service):
+    """Test that alerts for several locations come from one multi-zone request"""
+    boise = replace(_MOCK_LOCATION, forecast_zone="IDZ012")
+    seattle = NOAALocation(47.6062, -122.3321, "SEW", 124, 67, "SEW", "Seattle", "WA", "WAZ558")
+    
+    requested_urls = []
+    service._make_request = _fake_request([MockNOAAResponse.build("alerts")], requested_urls)
+    
+    alerts_by_location = await service.get_alerts_bulk([boise, seattle])
+    
+    assert requested_urls == ["https://api.weather.gov/alerts/active?zone=IDZ012,WAZ558"]
+    assert [alert.event for alert in alerts_by_location[boise]] == ["Heat Advisory"]
+    assert alerts_by_location[seattle] == []
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_noaa_iter_active_alerts(service):
+    """Test that streamed alerts match the buffered list when ijson is unavailable"""
+    service._make_request = _fake_request(repeat(MockNOAAResponse.build("alerts")))
+    
+    with patch('noaa_weather_service.IJSON_AVAILABLE', False):
+        streamed = [alert async for alert in service.iter_active_alerts(43.6150, -116.2023)]
+    
+    assert streamed == await service.get_active_alerts(43.6150, -116.2023)
+    assert [alert.event for alert in streamed] == ["Heat Advisory"]
+
+async def test_noaa_disk_cache(tmp_path):
+    """Test that cached point lookups skip the HTTP request and weather data bypasses the cache"""
+    service = NOAAWeatherService(cache_path=str(tmp_path / "noaa_cache.sqlite"))
+    points_url = f"{service.base_url}/points/43.615,-116.2023"
+    service._cache_put(points_url, MockNOAAResponse.build("points"))
+    
+    location = await service.get_location_info(43.6150, -116.2023)
+    assert location.city == "Boise"
+    assert service.session is None  # Served from disk, no HTTP session opened
+    
+    assert not service._is_cacheable(f"{service.base_url}/alerts/active?point=43.615,-116.2023")
+    # Current conditions and forecasts must never be served stale
+    grid_url = f"{service.base_url}/gridpoints/BOI/131,83"
+    for url in (grid_url, f"{grid_url}/forecast", f"{grid_url}/forecast/hourly"):
+        assert not service._is_cacheable(url)
+    
+    # Stale entries are ignored
+    service.cache_ttl = 0
+    assert service._cache_get(points_url) is None
+    
+    await service.close()
+
+
+class _FakeNOAAContent:
+    """Stands in for response.content, handing out the body a few bytes per read"""
+    
+    def __init__(self, body: bytes, chunk_size: int):
+        self._body = body
+        self._chunk_size = chunk_size
+        self.reads = 0
+    
+    async def read(self, n: int = -1) -> bytes:
+        size = self._chunk_size if n < 0 else min(n, self._chunk_size)
+        chunk, self._body = self._body[:size], self._body[size:]
+        self.reads += 1
+        await asyncio.sleep(0)
+        return chunk
+
+class _FakeNOAAResponse:
+    """Just enough of an aiohttp response for _make_request's 200 path and streaming"""
+    
+    status = 200
+    
+    def __init__(self, data: Dict[str, Any]):
+        self._data = data
+        self.content = _FakeNOAAContent(json.dumps(data).encode(), chunk_size=64)
+    
+    async def read(self) -> bytes:
+        return json.dumps(self._data).encode()
+    
+    async def json(self) -> Dict[str, Any]:
+        return self._data
     
-    return test.print_summary()
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        return False
+
+class _FakeNOAASession:
+    """Stands in for the aiohttp session, answering every GET with one payload"""
+    
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self.requested_urls: List[str] = []
+    
+    def get(self, url: str) -> _FakeNOAAResponse:
+        self.requested_urls.append(url)
+        self.last_response = _FakeNOAAResponse(self.data)
+        return self.last_response
+    
+    async def close(self):
+        pass
+
+async def test_noaa_broken_disk_cache_falls_back_to_network():
+    """Test that an unusable cache file neither fails nor drops a successful request"""
+    service = NOAAWeatherService(cache_path="/nonexistent_dir/noaa_cache.sqlite")
+    service.rate_limit_delay = 0
+    service.session = _FakeNOAASession(MockNOAAResponse.build("points"))
+    
+    location = await service.get_location_info(43.6150, -116.2023)
+    
+    assert location is not None and location.city == "Boise"
+    assert len(service.session.requested_urls) == 1
+    await service.close()
+
+async def test_noaa_cache_write_after_request_slot_released(tmp_path):
+    """Test that a fetched response is written to disk without holding a request slot"""
+    service = NOAAWeatherService(cache_path=str(tmp_path / "noaa_cache.sqlite"), concurrency=2)
+    service.rate_limit_delay = 0
+    service.session = _FakeNOAASession(MockNOAAResponse.build("points"))
+    free_slots = []
+    cache_put = service._cache_put
+    
+    def recording_put(url, data):
+        free_slots.append(service._request_slots._value)
+        cache_put(url, data)
+    
+    service._cache_put = recording_put
+    points_url = f"{service.base_url}/points/43.615,-116.2023"
+    
+    assert await service._make_request(points_url) == MockNOAAResponse.build("points")
+    assert free_slots == [2]
+    assert service._cache_get(points_url) == MockNOAAResponse.build("points")
+    await service.close()
+
+@pytest.mark.skipif(not IJSON_AVAILABLE, reason="ijson not installed")
+async def test_noaa_iter_active_alerts_streams_with_ijson():
+    """Test that ijson parses alerts from the body in chunks, holding a request slot while iterating"""
+    service = NOAAWeatherService(concurrency=2)
+    service.rate_limit_delay = 0
+    service.session = _FakeNOAASession(MockNOAAResponse.build("alerts"))
+    free_slots = []
+    
+    streamed = []
+    async for alert in service.iter_active_alerts(43.6150, -116.2023):
+        free_slots.append(service._request_slots._value)
+        streamed.append(alert)
+    
+    assert free_slots == [1]
+    assert service._request_slots._value == 2
+    assert service.session.last_response.content.reads > 1
+    assert streamed == await service.get_active_alerts(43.6150, -116.2023)
+    assert [alert.event for alert in streamed] == ["Heat Advisory"]
+    await service.close()
 
-async def test_noaa_error_handling():
+@pytest.mark.asyncio(loop_scope="module")
+async def test_noaa_location_caching(service):
+    """Test that location lookups are served from the cache"""
+    requested_urls = []
+    service._make_request = _fake_request(repeat(MockNOAAResponse.build("points")), requested_urls)
+    
+    location = await service.get_location_info(43.6150, -116.2023)
+    cached_location = await service.get_location_info(43.6150, -116.2023)
+    
+    assert cached_location.city == location.city
+    assert len(requested_urls) == 1
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_noaa_error_handling(service):
     """Test NOAA service error handling and fallback mechanisms"""
-    print("\n🛡️ Testing NOAA Error Handling...")
-    test = SimpleTestRunner()
+    # Test API failure handling
+    service._make_request = _fake_request(repeat(None))
     
-    async with NOAAWeatherService() as service:
-        # Test API failure handling
-        service._make_request = AsyncMock(return_value=None)
-        
-        location = await service.get_location_info(43.6150, -116.2023)
-        test.assert_true(location is None, "Handles API failure for location")
-        
-        # Test malformed response handling
-        service._make_request.return_value = {"invalid": "response"}
-        location = await service.get_location_info(43.6150, -116.2023)
-        test.assert_true(location is None, "Handles malformed location response")
-        
-        # Test weather data error handling
-        mock_location = NOAALocation(43.6150, -116.2023, "BOI", 73, 87, "BOI", "Boise", "ID")
-        service._make_request.return_value = None
-        weather = await service.get_current_weather(mock_location)
-        test.assert_true(weather is None, "Handles weather API failure")
-        
-        # Test alerts error handling
-        alerts = await service.get_active_alerts(43.6150, -116.2023)
-        test.assert_equal(len(alerts), 0, "Handles alerts API failure gracefully")
+    location = await service.get_location_info(43.6150, -116.2023)
+    assert location is None
+    
+    # Test malformed response handling
+    service._make_request = _fake_request([{"invalid": "response"}])
+    location = await service.get_location_info(43.6150, -116.2023)
+    assert location is None
     
-    return test.print_summary()
+    # Test weather data error handling
+    service._make_request = _fake_request(repeat(None))
+    weather = await service.get_current_weather(_MOCK_LOCATION)
+    assert weather is None
+    
+    # Test alerts error handling
+    alerts = await service.get_active_alerts(43.6150, -116.2023)
+    assert len(alerts) == 0
 
 async def test_weather_agent_noaa_integration():
     """Test weather monitoring agent integration with NOAA service"""
-    print("\n🤖 Testing Weather Agent NOAA Integration...")
-    test = SimpleTestRunner()
-    
     # Create agent with NOAA enabled
     agent = WeatherMonitoringAgent("test_noaa_agent", "Boise, ID", use_real_weather=True)
     
-    # Mock the NOAA service
-    mock_noaa = AsyncMock()
-    mock_noaa.initialize = AsyncMock()
-    mock_noaa.close = AsyncMock()
-    mock_noaa.get_location_info = AsyncMock()
-    mock_noaa.get_current_weather = AsyncMock()
-    mock_noaa.get_active_alerts = AsyncMock()
-    
-    # Configure mock responses
-    mock_location = NOAALocation(43.6150, -116.2023, "BOI", 73, 87, "BOI", "Boise", "ID")
-    mock_noaa.get_location_info.return_value = mock_location
-    
-    mock_weather = NOAAWeatherReading(
-        timestamp="2024-01-15T14:00:00Z",
-        temperature_f=72.5,
-        humidity_percent=58.0,
-        wind_speed_mph=8.5,
-        wind_direction="NW",
-        pressure_mb=1013.2,
-        visibility_miles=10.0,
-        conditions="Clear",
-        detailed_forecast="Clear skies."
-    )
-    mock_noaa.get_current_weather.return_value = mock_weather
-    
-    mock_alerts = [
-        NOAAAlert(
-            alert_id="test_alert",
-            event="Heat Advisory",
-            severity="Moderate",
-            certainty="Likely",
-            urgency="Expected",
-            headline="Heat Advisory",
-            description="Hot weather",
-            instruction="Stay cool",
-            areas=["Ada County"],
-            effective="2024-01-15T12:00:00Z",
-            expires="2024-01-15T20:00:00Z",
-            sender="NWS",
-            status="Actual",
-            message_type="Alert"
-        )
-    ]
-    mock_noaa.get_active_alerts.return_value = mock_alerts
+    # Stub the NOAA service
+    mock_noaa = StubNOAA()
     
     # Patch the NOAAWeatherService constructor
     with patch('weather_monitoring_agent.NOAAWeatherService', return_value=mock_noaa):
@@ -446,125 +634,82 @@ async def test_weather_agent_noaa_integration():
             # Initialize the agent
             await agent.initialize()
             
-            test.assert_true(agent.use_real_weather, "Real weather enabled")
-            test.assert_not_none(agent.noaa_service, "NOAA service initialized")
-            test.assert_not_none(agent.noaa_location, "NOAA location set")
-            test.assert_equal(len(agent.weather_data), 1, "Initial weather reading created")
-            test.assert_equal(len(agent.noaa_alerts), 1, "Initial NOAA alerts retrieved")
+            assert agent.use_real_weather
+            assert agent.noaa_service is not None
+            assert agent.noaa_location is not None
+            assert len(agent.weather_data) == 1
+            assert len(agent.noaa_alerts) == 1
             
             # Test capabilities include NOAA features
             capabilities = await agent.get_capabilities()
-            test.assert_in("get_noaa_alerts", capabilities, "NOAA alerts capability present")
-            test.assert_in("refresh_noaa_data", capabilities, "NOAA refresh capability present")
+            assert "get_noaa_alerts" in capabilities
+            assert "refresh_noaa_data" in capabilities
             
             # Test NOAA conversion
-            converted = agent._convert_noaa_reading(mock_weather)
-            test.assert_equal(converted.temperature_f, 72.5, "NOAA temperature converted")
-            test.assert_equal(converted.conditions, "Clear", "NOAA conditions converted")
+            converted = agent._convert_noaa_reading(_MOCK_WEATHER)
+            assert converted.temperature_f == 72.5
+            assert converted.conditions == "Clear"
             
             # Cleanup
             await agent.cleanup()
-    
-    return test.print_summary()
 
 async def test_noaa_message_handlers():
     """Test NOAA-specific message handlers"""
-    print("\n💬 Testing NOAA Message Handlers...")
-    test = SimpleTestRunner()
-    
     # Create agent with NOAA enabled
     agent = WeatherMonitoringAgent("test_handlers", "Boise, ID", use_real_weather=True)
     
     # Mock NOAA components
-    mock_location = NOAALocation(43.6150, -116.2023, "BOI", 73, 87, "BOI", "Boise", "ID")
-    agent.noaa_location = mock_location
-    agent.noaa_alerts = [
-        NOAAAlert(
-            alert_id="handler_test_alert",
-            event="Winter Weather Advisory",
-            severity="Minor",
-            certainty="Likely",
-            urgency="Expected",
-            headline="Snow expected",
-            description="Light snow possible",
-            instruction="Drive carefully",
-            areas=["Ada County"],
-            effective="2024-01-15T18:00:00Z",
-            expires="2024-01-16T06:00:00Z",
-            sender="NWS",
-            status="Actual",
-            message_type="Alert"
-        )
-    ]
+    agent.noaa_location = _MOCK_LOCATION
+    agent.noaa_alerts = [_WINTER_ADVISORY]
     
     # Mock send_message
     sent_messages = []
-    async def mock_send(message):
-        sent_messages.append(message)
-    agent.send_message = mock_send
+    agent.send_message = collecting_async(sent_messages)
     
     # Test get_noaa_alerts handler
     noaa_alerts_message = CrossLanguageMessage(
         msg_id="test_noaa_alerts",
         msg_type="get_noaa_alerts",
-        source={"agentId": "test_requester", "language": "javascript", "runtime": "nodejs"},
+        source=_JS_SOURCE,
         destination={"agentId": agent.agent_id},
         payload={},
-        metadata={"priority": "normal", "retryCount": 0, "maxRetries": 0, "timeoutMs": 5000}
+        metadata=_DEFAULT_META
     )
     
     await agent.handle_get_noaa_alerts(noaa_alerts_message)
     
-    test.assert_equal(len(sent_messages), 1, "NOAA alerts response sent")
+    assert len(sent_messages) == 1
     response = sent_messages[0]
-    test.assert_equal(response.type, "noaa_alerts_response", "Correct response type")
-    test.assert_equal(response.payload['alert_count'], 1, "Correct alert count in response")
-    test.assert_true(response.payload['noaa_enabled'], "NOAA enabled flag correct")
+    assert response.type == "noaa_alerts_response"
+    assert response.payload['alert_count'] == 1
+    assert response.payload['noaa_enabled']
     
     # Test refresh_noaa_data handler
     sent_messages.clear()
     
-    # Mock NOAA service for refresh
-    mock_noaa = AsyncMock()
-    mock_weather = NOAAWeatherReading(
-        timestamp="2024-01-15T15:00:00Z",
-        temperature_f=68.0,
-        humidity_percent=60.0,
-        wind_speed_mph=5.0,
-        wind_direction="E",
-        pressure_mb=1015.0,
-        visibility_miles=10.0,
-        conditions="Sunny",
-        detailed_forecast="Sunny skies."
-    )
-    mock_noaa.get_current_weather.return_value = mock_weather
-    mock_noaa.get_active_alerts.return_value = []
-    agent.noaa_service = mock_noaa
+    # Stub NOAA service for refresh
+    agent.noaa_service = StubNOAA(alerts=())
     
     refresh_message = CrossLanguageMessage(
         msg_id="test_refresh",
         msg_type="refresh_noaa_data",
-        source={"agentId": "test_requester", "language": "javascript", "runtime": "nodejs"},
+        source=_JS_SOURCE,
         destination={"agentId": agent.agent_id},
         payload={},
-        metadata={"priority": "normal", "retryCount": 0, "maxRetries": 0, "timeoutMs": 5000}
+        metadata=_DEFAULT_META
     )
     
     await agent.handle_refresh_noaa_data(refresh_message)
     
-    test.assert_equal(len(sent_messages), 1, "Refresh response sent")
+    assert len(sent_messages) == 1
     refresh_response = sent_messages[0]
-    test.assert_equal(refresh_response.type, "refresh_noaa_response", "Correct refresh response type")
-    test.assert_true(refresh_response.payload['success'], "Refresh successful")
-    test.assert_equal(len(agent.weather_data), 2, "New weather reading added after refresh")
-    
-    return test.print_summary()
+    assert refresh_response.type == "noaa_data_refreshed"
+    assert refresh_response.payload['success']
+    # The agent was never initialized, so the refreshed reading is the only one
+    assert len(agent.weather_data) == 1
 
 async def test_noaa_fallback_behavior():
     """Test fallback behavior when NOAA service fails"""
-    print("\n🔄 Testing NOAA Fallback Behavior...")
-    test = SimpleTestRunner()
-    
     # Test agent initialization with NOAA failure
     with patch('weather_monitoring_agent.NOAAWeatherService') as mock_service_class:
         mock_service_class.side_effect = Exception("NOAA service unavailable")
@@ -572,66 +717,29 @@ async def test_noaa_fallback_behavior():
         agent = WeatherMonitoringAgent("test_fallback", "Boise, ID", use_real_weather=True)
         await agent.initialize()
         
-        test.assert_true(not agent.use_real_weather, "Fallback to simulation on NOAA failure")
-        test.assert_true(agent.noaa_service is None, "NOAA service not initialized")
-        test.assert_equal(len(agent.weather_data), 1, "Fallback weather reading created")
+        assert not agent.use_real_weather
+        assert agent.noaa_service is None
+        assert len(agent.weather_data) == 1
     
     # Test agent with successful NOAA init but failed geocoding
     with patch('weather_monitoring_agent.geocode_city_state', return_value=None):
         agent2 = WeatherMonitoringAgent("test_fallback2", "Unknown City, ZZ", use_real_weather=True)
         await agent2.initialize()
         
-        test.assert_true(not agent2.use_real_weather, "Fallback on geocoding failure")
+        assert not agent2.use_real_weather
     
     # Test runtime fallback during monitoring
     agent3 = WeatherMonitoringAgent("test_fallback3", "Boise, ID", use_real_weather=True)
     
     # Mock successful initialization
-    mock_noaa = AsyncMock()
-    mock_location = NOAALocation(43.6150, -116.2023, "BOI", 73, 87, "BOI", "Boise", "ID")
+    mock_noaa = StubNOAA(weather=None, alerts=())  # Simulate weather API failure
     
     with patch('weather_monitoring_agent.NOAAWeatherService', return_value=mock_noaa):
         with patch('weather_monitoring_agent.geocode_city_state', return_value=(43.6150, -116.2023)):
-            mock_noaa.get_location_info.return_value = mock_location
-            mock_noaa.get_current_weather.return_value = None  # Simulate API failure
-            mock_noaa.get_active_alerts.return_value = []
-            
             await agent3.initialize()
             
             # The agent should fall back to simulation for the weather reading
             # but still maintain NOAA integration for alerts
-            test.assert_true(agent3.use_real_weather, "NOAA integration maintained")
-            test.assert_not_none(agent3.noaa_service, "NOAA service available")
-            test.assert_equal(len(agent3.weather_data), 1, "Weather reading created (fallback)")
-    
-    return test.print_summary()
-
-async def main():
-    """Run all NOAA integration tests"""
-    print("🧪 Starting NOAA Integration Tests\n")
-    
-    all_passed = True
-    
-    # Run all test suites
-    all_passed &= await test_noaa_service_initialization()
-    all_passed &= await test_geocoding_functionality()
-    all_passed &= await test_noaa_data_structures()
-    all_passed &= await test_noaa_api_requests()
-    all_passed &= await test_noaa_error_handling()
-    all_passed &= await test_weather_agent_noaa_integration()
-    all_passed &= await test_noaa_message_handlers()
-    all_passed &= await test_noaa_fallback_behavior()
-    
-    print("\n" + "="*50)
-    if all_passed:
-        print("🎉 ALL NOAA INTEGRATION TESTS PASSED!")
-        print("✅ NOAA weather service integration is working correctly.")
-        return 0
-    else:
-        print("💥 SOME NOAA INTEGRATION TESTS FAILED!")
-        print("❌ Check the output above for details.")
-        return 1
-
-if __name__ == "__main__":
-    exit_code = asyncio.run(main())
-    sys.exit(exit_code)
\ No newline at end of file
+            assert agent3.use_real_weather
+            assert agent3.noaa_service is not None
+            assert len(agent3.weather_data) == 1
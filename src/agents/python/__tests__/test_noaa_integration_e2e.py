@@ -13,18 +13,24 @@ These tests verify:
 - Data format consistency across the system
 
 Usage: python3 test_noaa_integration_e2e.py
+   or: pytest -n auto test_noaa_integration_e2e.py
 """
 
 import sys
 import asyncio
 import json
 from datetime import datetime, timezone
-from typing import List, Dict, Any
+from collections import deque
+from typing import ClassVar, Dict, Any, Deque, Mapping, Optional, Tuple
+from functools import lru_cache
+from types import MappingProxyType
 import unittest
 
 # Add parent directory to path for imports
 import os
+import socket
 import sys
+import tempfile
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import the weather monitoring components
@@ -33,7 +39,7 @@ from base_agent import CrossLanguageMessage
 
 # Try to import NOAA components, fallback if not available
 try:
-    from noaa_weather_service import NOAAWeatherService, NOAALocation, NOAAAlert
+    from noaa_weather_service import NOAAWeatherService, NOAALocation, NOAAAlert, geocode_city_state
     NOAA_AVAILABLE = True
 except ImportError as e:
     print(f"⚠️ NOAA service not available: {e}")
@@ -41,15 +47,69 @@ except ImportError as e:
     NOAAWeatherService = None
     NOAALocation = None
     NOAAAlert = None
+    geocode_city_state = None
+
+# uvloop is optional (and unavailable on Windows); it only speeds up the test loop
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
+def _noaa_api_reachable(timeout: float = 3.0) -> bool:
+    """Whether api.weather.gov accepts connections from this machine"""
+    try:
+        with socket.create_connection(("api.weather.gov", 443), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+# Tests that talk to the live NOAA API need aiohttp and a network route to it
+NOAA_API_REACHABLE = NOAA_AVAILABLE and _noaa_api_reachable()
+requires_noaa_api = unittest.skipUnless(NOAA_API_REACHABLE, "NOAA API not reachable (aiohttp missing or no network)")
+
+# On-disk cache for NOAA point lookups, shared between test runs
+NOAA_CACHE_PATH = os.path.join(tempfile.gettempdir(), "noaa_e2e_cache.sqlite")
+
+
+# Sender identity shared by every request the tests send to an agent
+_TEST_SOURCE: Dict[str, str] = {"agentId": "test_sender", "language": "javascript", "runtime": "nodejs"}
+
+
+@lru_cache(maxsize=None)
+def _request_metadata(timeout_ms: int) -> Mapping[str, Any]:
+    """Read-only request metadata, built once per timeout"""
+    return MappingProxyType({"priority": "normal", "retryCount": 0, "maxRetries": 0, "timeoutMs": timeout_ms})
+
+
+def make_msg(msg_id: str, msg_type: str, agent_id: str,
+             payload: Optional[Dict[str, Any]] = None, timeout: int = 5000) -> CrossLanguageMessage:
+    """Build a test request addressed to an agent"""
+    return CrossLanguageMessage(
+        msg_id=msg_id,
+        msg_type=msg_type,
+        source=_TEST_SOURCE,
+        destination={"agentId": agent_id},
+        payload=payload if payload is not None else {},
+        metadata=_request_metadata(timeout)
+    )
+
+
+# Captured traffic is a ring buffer; tests only look at the newest entries or the count
+MAX_CAPTURED_MESSAGES = 1024
 
 
 class MockMultiLanguageRuntime:
     """Mock runtime for testing cross-language communication"""
     
+    __slots__ = ("messages_received", "alert_broadcasts", "is_connected", "alert_event")
+    
     def __init__(self):
-        self.messages_received: List[CrossLanguageMessage] = []
-        self.alert_broadcasts: List[Dict[str, Any]] = []
+        self.messages_received: Deque[CrossLanguageMessage] = deque(maxlen=MAX_CAPTURED_MESSAGES)
+        self.alert_broadcasts: Deque[Dict[str, Any]] = deque(maxlen=MAX_CAPTURED_MESSAGES)
         self.is_connected = True
+        self.alert_event = asyncio.Event()  # Set on the first weather alert broadcast
     
     async def send_message(self, message: CrossLanguageMessage):
         """Mock sending a message to the runtime"""
@@ -58,8 +118,9 @@ class MockMultiLanguageRuntime:
         # If this is a weather alert, capture it
         if message.type == "weather_alert" and "alert" in message.payload:
             self.alert_broadcasts.append(message.payload["alert"])
+            self.alert_event.set()
     
-    def get_latest_alerts(self) -> List[Dict[str, Any]]:
+    def get_latest_alerts(self) -> Deque[Dict[str, Any]]:
         """Get all alert broadcasts received"""
         return self.alert_broadcasts
     
@@ -67,32 +128,62 @@ class MockMultiLanguageRuntime:
         """Clear all captured messages"""
         self.messages_received.clear()
         self.alert_broadcasts.clear()
+        self.alert_event.clear()
 
 
-class NOAAIntegrationE2ETest(unittest.TestCase):
+class NOAAIntegrationE2ETest(unittest.IsolatedAsyncioTestCase):
     """End-to-end tests for NOAA weather integration"""
     
-    def setUp(self):
-        """Set up test fixtures"""
+    # NOAA grid lookups by "City, ST"; NOAALocation is frozen, so tests can share them
+    _location_cache: Dict[str, "NOAALocation"] = {}
+    
+    TEST_LOCATIONS: ClassVar[Tuple[str, ...]] = ("Boise, ID", "Seattle, WA", "Denver, CO")
+    
+    async def asyncSetUp(self):
+        """Open the NOAA services and a fresh mock runtime on this test's event loop"""
         self.mock_runtime = MockMultiLanguageRuntime()
-        self.test_locations = [
-            "Boise, ID",
-            "Seattle, WA", 
-            "Denver, CO"
-        ]
+        
+        # aiohttp sessions are bound to the loop that created them, and every
+        # test runs on its own loop, so the connection pools are per test.
+        # Point lookups are still shared through the on-disk cache;
+        # the live connectivity test uses an uncached service so it always
+        # reaches the API.
+        if NOAA_AVAILABLE:
+            self.noaa_service = NOAAWeatherService(cache_path=NOAA_CACHE_PATH)
+            self.live_noaa_service = NOAAWeatherService()
+        else:
+            self.noaa_service = None
+            self.live_noaa_service = None
+    
+    async def asyncTearDown(self):
+        """Release the NOAA connection pools"""
+        for service in (self.noaa_service, self.live_noaa_service):
+            if service:
+                await service.close()
+    
+    async def _get_location(self, name: str) -> Optional["NOAALocation"]:
+        """Resolve a "City, ST" name to its NOAA grid location, once per test run"""
+        if name not in self._location_cache:
+            coords = geocode_city_state(*name.split(', '))
+            if not coords:
+                return None
+            
+            location = await self.noaa_service.get_location_info(*coords)
+            if not location:
+                return None
+            self._location_cache[name] = location
+        
+        return self._location_cache[name]
     
+    @requires_noaa_api
     async def test_noaa_service_live_api_connection(self):
         """Test actual NOAA API connectivity and responses"""
         print("\n🌐 Testing live NOAA API connection...")
         
-        if not NOAA_AVAILABLE:
-            print("⚠️ Skipping NOAA API test - aiohttp not available")
-            return
-        
-        noaa_service = NOAAWeatherService()
+        noaa_service = self.live_noaa_service
         
         # Test location lookup for Boise
-        location = await noaa_service.get_location_info("Boise, ID")
+        location = await noaa_service.get_location_info(*geocode_city_state("Boise", "ID"))
         
         self.assertIsNotNone(location, "Should get location info for Boise")
         self.assertEqual(location.city.lower(), "boise", "City should be Boise")
@@ -114,7 +205,7 @@ class NOAAIntegrationE2ETest(unittest.TestCase):
             print("⚠️ No current weather data available (this is normal for some locations)")
         
         # Test alerts fetch
-        alerts = await noaa_service.get_alerts(location)
+        alerts = await noaa_service.get_active_alerts(location.latitude, location.longitude)
         print(f"✅ Alerts fetch successful: {len(alerts)} active alerts")
         
         # Test forecast fetch
@@ -126,6 +217,7 @@ class NOAAIntegrationE2ETest(unittest.TestCase):
         else:
             print("⚠️ No forecast data available")
     
+    @requires_noaa_api
     async def test_weather_agent_noaa_integration(self):
         """Test weather monitoring agent with NOAA integration"""
         print("\n🤖 Testing weather agent NOAA integration...")
@@ -139,6 +231,7 @@ class NOAAIntegrationE2ETest(unittest.TestCase):
         
         # Mock the send_message method to capture communications
         agent.send_message = self.mock_runtime.send_message
+        self.addAsyncCleanup(agent.cleanup)
         
         # Initialize agent (should set up NOAA service)
         await agent.initialize()
@@ -149,45 +242,23 @@ class NOAAIntegrationE2ETest(unittest.TestCase):
         
         print(f"✅ Agent initialized with NOAA location: {agent.noaa_location.city}, {agent.noaa_location.state}")
         
-        # Test NOAA alerts fetch
-        noaa_alerts_message = CrossLanguageMessage(
-            msg_id="test_noaa_alerts_001",
-            msg_type="get_noaa_alerts",
-            source={"agentId": "test_sender", "language": "javascript", "runtime": "nodejs"},
-            destination={"agentId": agent.agent_id},
-            payload={},
-            metadata={"priority": "normal", "retryCount": 0, "maxRetries": 0, "timeoutMs": 10000}
-        )
+        # The alerts fetch and the data refresh are independent, so run them together
+        noaa_alerts_message = make_msg("test_noaa_alerts_001", "get_noaa_alerts", agent.agent_id, timeout=10000)
+        refresh_message = make_msg("test_refresh_001", "refresh_noaa_data", agent.agent_id, timeout=10000)
         
-        await agent.handle_get_noaa_alerts(noaa_alerts_message)
-        
-        # Check that a response was sent
-        self.assertGreater(len(self.mock_runtime.messages_received), 0, "Should send response message")
-        
-        response = self.mock_runtime.messages_received[-1]
-        self.assertEqual(response.type, "noaa_alerts_response", "Should send NOAA alerts response")
-        self.assertIn("alerts", response.payload, "Response should contain alerts")
-        
-        print(f"✅ NOAA alerts response: {len(response.payload['alerts'])} alerts")
+        await asyncio.gather(
+            agent.handle_get_noaa_alerts(noaa_alerts_message),
+            agent.handle_refresh_noaa_data(refresh_message)
+        )
         
-        # Test NOAA data refresh
-        self.mock_runtime.clear_messages()
+        responses = {message.type: message for message in self.mock_runtime.messages_received}
         
-        refresh_message = CrossLanguageMessage(
-            msg_id="test_refresh_001", 
-            msg_type="refresh_noaa_data",
-            source={"agentId": "test_sender", "language": "javascript", "runtime": "nodejs"},
-            destination={"agentId": agent.agent_id},
-            payload={},
-            metadata={"priority": "normal", "retryCount": 0, "maxRetries": 0, "timeoutMs": 10000}
-        )
+        self.assertIn("noaa_alerts_response", responses, "Should send NOAA alerts response")
+        self.assertIn("alerts", responses["noaa_alerts_response"].payload, "Response should contain alerts")
         
-        await agent.handle_refresh_noaa_data(refresh_message)
+        print(f"✅ NOAA alerts response: {len(responses['noaa_alerts_response'].payload['alerts'])} alerts")
         
-        # Should get a refresh response
-        self.assertGreater(len(self.mock_runtime.messages_received), 0, "Should send refresh response")
-        refresh_response = self.mock_runtime.messages_received[-1]
-        self.assertEqual(refresh_response.type, "noaa_data_refreshed", "Should send refresh confirmation")
+        self.assertIn("noaa_data_refreshed", responses, "Should send refresh confirmation")
         
         print("✅ NOAA data refresh successful")
     
@@ -203,25 +274,19 @@ class NOAAIntegrationE2ETest(unittest.TestCase):
         )
         
         agent.send_message = self.mock_runtime.send_message
+        self.addAsyncCleanup(agent.cleanup)
         
         # Initialize agent (should fallback to simulation)
         await agent.initialize()
         
-        # Agent should fallback to simulation mode
+        # Agent should fallback to simulation mode and release the unused service
         self.assertFalse(agent.use_real_weather, "Agent should fallback to simulation")
         self.assertIsNone(agent.noaa_service, "Agent should not have NOAA service after fallback")
         
         print("✅ Agent correctly fell back to simulation mode")
         
         # Test that agent still functions normally in simulation mode
-        current_weather_message = CrossLanguageMessage(
-            msg_id="test_fallback_weather_001",
-            msg_type="get_current_weather",
-            source={"agentId": "test_sender", "language": "javascript", "runtime": "nodejs"},
-            destination={"agentId": agent.agent_id},
-            payload={},
-            metadata={"priority": "normal", "retryCount": 0, "maxRetries": 0, "timeoutMs": 5000}
-        )
+        current_weather_message = make_msg("test_fallback_weather_001", "get_current_weather", agent.agent_id)
         
         self.mock_runtime.clear_messages()
         await agent.handle_get_current_weather(current_weather_message)
@@ -244,81 +309,94 @@ class NOAAIntegrationE2ETest(unittest.TestCase):
         )
         
         agent.send_message = self.mock_runtime.send_message
+        self.addAsyncCleanup(agent.cleanup)
         await agent.initialize()
         
         # Clear any initialization messages
         self.mock_runtime.clear_messages()
         
         # Start monitoring to potentially trigger alerts
-        start_message = CrossLanguageMessage(
-            msg_id="test_start_monitoring_001",
-            msg_type="start_monitoring", 
-            source={"agentId": "test_sender", "language": "javascript", "runtime": "nodejs"},
-            destination={"agentId": agent.agent_id},
-            payload={"duration_hours": 1},
-            metadata={"priority": "normal", "retryCount": 0, "maxRetries": 0, "timeoutMs": 5000}
-        )
+        start_message = make_msg("test_start_monitoring_001", "start_monitoring", agent.agent_id, {"duration_hours": 1})
         
         await agent.handle_start_monitoring(start_message)
         
         print("✅ Monitoring started, checking for alert broadcasts...")
         
-        # Let monitoring run for a short period to potentially generate alerts
-        await asyncio.sleep(2)
+        # Let monitoring run until the first alert arrives, for at most 2 seconds
+        try:
+            await asyncio.wait_for(self.mock_runtime.alert_event.wait(), timeout=2)
+        except asyncio.TimeoutError:
+            pass
         
         # Check if any weather alerts were broadcast
         alert_count = len(self.mock_runtime.get_latest_alerts())
         print(f"✅ Alert broadcasts captured: {alert_count}")
         
         # Stop monitoring
-        stop_message = CrossLanguageMessage(
-            msg_id="test_stop_monitoring_001",
-            msg_type="stop_monitoring",
-            source={"agentId": "test_sender", "language": "javascript", "runtime": "nodejs"},
-            destination={"agentId": agent.agent_id},
-            payload={},
-            metadata={"priority": "normal", "retryCount": 0, "maxRetries": 0, "timeoutMs": 5000}
-        )
+        stop_message = make_msg("test_stop_monitoring_001", "stop_monitoring", agent.agent_id)
         
         await agent.handle_stop_monitoring(stop_message)
         print("✅ Monitoring stopped")
     
+    @requires_noaa_api
     async def test_multiple_location_noaa_support(self):
         """Test NOAA integration with multiple geographic locations"""
         print("\n🗺️ Testing multiple location NOAA support...")
         
-        if not NOAA_AVAILABLE:
-            print("⚠️ Skipping multiple location test - aiohttp not available")
-            return
+        noaa_service = self.noaa_service
+        
+        async def probe(location):
+            location_info = await self._get_location(location)
+            if not location_info:
+                return location_info, None
+            return location_info, await noaa_service.get_current_weather(location_info)
         
-        for location in self.test_locations:
+        # Probe every location concurrently; the NOAA round-trips overlap, and
+        # the first failure cancels the probes still waiting on the network
+        errors = []
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tasks = {location: tg.create_task(probe(location)) for location in self.TEST_LOCATIONS}
+        except* Exception as group:
+            errors.extend(group.exceptions)
+        
+        # One multi-zone alerts request covers every resolved location
+        location_infos = [
+            task.result()[0] for task in tasks.values()
+            if not task.cancelled() and not task.exception() and task.result()[0]
+        ]
+        alerts_by_location = await noaa_service.get_alerts_bulk(location_infos)
+        
+        for location, task in tasks.items():
             print(f"Testing location: {location}")
             
-            noaa_service = NOAAWeatherService()
-            location_info = await noaa_service.get_location_info(location)
+            if task.cancelled():
+                print(f"⏹️ {location}: cancelled after an earlier failure")
+                continue
+            if task.exception():
+                print(f"💥 {location}: {task.exception()}")
+                continue
             
+            location_info, weather = task.result()
             if location_info:
+                alerts = alerts_by_location[location_info]
                 print(f"✅ {location}: {location_info.city}, {location_info.state} (Grid: {location_info.grid_id})")
-                
-                # Test weather fetch for this location
-                weather = await noaa_service.get_current_weather(location_info)
-                alerts = await noaa_service.get_alerts(location_info)
-                
                 print(f"   Weather: {'Available' if weather else 'Not available'}")
                 print(f"   Alerts: {len(alerts)} active")
             else:
                 print(f"❌ Failed to get location info for {location}")
+        
+        # Every location has been reported; surface the failures together
+        if errors:
+            raise ExceptionGroup("NOAA location probes failed", errors)
     
+    @requires_noaa_api
     async def test_noaa_data_format_consistency(self):
         """Test that NOAA data formats are consistent with internal formats"""
         print("\n📊 Testing NOAA data format consistency...")
         
-        if not NOAA_AVAILABLE:
-            print("⚠️ Skipping data format test - aiohttp not available")
-            return
-        
-        noaa_service = NOAAWeatherService()
-        location = await noaa_service.get_location_info("Boise, ID")
+        noaa_service = self.noaa_service
+        location = await self._get_location("Boise, ID")
         
         if location:
             # Test weather data format
@@ -338,7 +416,7 @@ class NOAAIntegrationE2ETest(unittest.TestCase):
                 print("✅ Weather data format validation passed")
             
             # Test alert data format
-            alerts = await noaa_service.get_alerts(location)
+            alerts = await noaa_service.get_active_alerts(location.latitude, location.longitude)
             for alert in alerts:
                 alert_dict = alert.to_dict()
                 
@@ -353,61 +431,7 @@ class NOAAIntegrationE2ETest(unittest.TestCase):
             print(f"✅ Alert data format validation passed ({len(alerts)} alerts)")
 
 
-async def run_e2e_tests():
-    """Run all end-to-end tests"""
-    print("🧪 Starting NOAA Weather Integration End-to-End Tests\n")
-    
-    test_instance = NOAAIntegrationE2ETest()
-    test_instance.setUp()
-    
-    tests = [
-        ("NOAA API Live Connection", test_instance.test_noaa_service_live_api_connection),
-        ("Weather Agent NOAA Integration", test_instance.test_weather_agent_noaa_integration),
-        ("NOAA Fallback Behavior", test_instance.test_noaa_fallback_behavior),
-        ("NOAA Alert Broadcasting", test_instance.test_noaa_alert_broadcasting),
-        ("Multiple Location Support", test_instance.test_multiple_location_noaa_support),
-        ("NOAA Data Format Consistency", test_instance.test_noaa_data_format_consistency)
-    ]
-    
-    passed_tests = 0
-    failed_tests = 0
-    
-    for test_name, test_func in tests:
-        try:
-            print(f"\n{'='*50}")
-            print(f"Running: {test_name}")
-            print('='*50)
-            
-            await test_func()
-            passed_tests += 1
-            print(f"✅ {test_name} - PASSED")
-            
-        except AssertionError as e:
-            failed_tests += 1
-            print(f"❌ {test_name} - FAILED: {str(e)}")
-            
-        except Exception as e:
-            failed_tests += 1
-            print(f"💥 {test_name} - ERROR: {str(e)}")
-    
-    # Print final results
-    print(f"\n{'='*60}")
-    print(f"🏁 End-to-End Test Results")
-    print(f"{'='*60}")
-    print(f"Tests Run: {passed_tests + failed_tests}")
-    print(f"Passed: {passed_tests}")
-    print(f"Failed: {failed_tests}")
-    
-    if failed_tests == 0:
-        print("🎉 ALL END-TO-END TESTS PASSED!")
-        print("NOAA weather integration is working correctly.")
-        return 0
-    else:
-        print("💥 SOME END-TO-END TESTS FAILED!")
-        print("Check the output above for details.")
-        return 1
-
-
 if __name__ == "__main__":
-    exit_code = asyncio.run(run_e2e_tests())
-    sys.exit(exit_code)
\ No newline at end of file
+    if UVLOOP_AVAILABLE:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    unittest.main(verbosity=2)
@@ -14,11 +14,12 @@ Comprehensive test suite covering all aspects of the weather monitoring agent:
 
 import pytest
 import asyncio
+import dataclasses
 import json
 import sys
 import os
 from datetime import datetime, timezone, timedelta
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import MagicMock
 from typing import Dict, Any, List
 
 # Add the parent directory to the path to import the agent modules
@@ -32,6 +33,106 @@ from weather_monitoring_agent import (
 )
 from base_agent import CrossLanguageMessage
 
+# Reference clock for test readings, read once at import; readings are placed
+# relative to it so the analysis windows still see them
+_BASE_TIME = datetime.now(timezone.utc)
+_BASE_ISO = _BASE_TIME.isoformat()
+
+# 16-point compass directions a reading's wind_direction may take
+_VALID_DIRECTIONS = frozenset(('N', 'NNE', 'NE', 'ENE', 'E', 'ESE', 'SE', 'SSE',
+                               'S', 'SSW', 'SW', 'WSW', 'W', 'WNW', 'NW', 'NNW'))
+
+def make_msg(msg_type: str, payload: Dict[str, Any], agent_id: str,
+             msg_id: str = "test_msg_001") -> CrossLanguageMessage:
+    """Build a request from a JavaScript test sender to the agent under test"""
+    return CrossLanguageMessage(
+        msg_id=msg_id,
+        msg_type=msg_type,
+        source={"agentId": "test_sender", "language": "javascript", "runtime": "nodejs"},
+        destination={"agentId": agent_id},
+        payload=payload,
+        metadata={"priority": "normal", "retryCount": 0, "maxRetries": 0, "timeoutMs": 5000}
+    )
+
+# One request/response exchange per row: (msg_type, handler attribute, request
+# payload, expected response type, payload key that must be set, expected payload values)
+HANDLER_CASES = [
+    ("get_current_weather", "handle_get_current_weather", {},
+     "weather_response", "current_weather", {"location": "Test City"}),
+    ("get_weather_history", "handle_get_weather_history", {"hours_back": 12},
+     "weather_history_response", "weather_history", {"hours_requested": 12}),
+    ("get_weather_forecast", "handle_get_weather_forecast", {"hours_ahead": 6},
+     "weather_forecast_response", "forecast", {"data_quality": "simulated"}),
+    ("get_weather_alerts", "handle_get_weather_alerts", {},
+     "weather_alerts_response", "active_alerts", {"alert_count": 1}),
+    ("update_alert_thresholds", "handle_update_alert_thresholds",
+     {"thresholds": {"temperature_high": 100.0, "wind_high": 35.0}},
+     "thresholds_update_response", "success", {"success": True}),
+    ("weather_analysis_request", "handle_weather_analysis_request", {"hours_back": 24},
+     "weather_analysis_response", "analysis", {"location": "Test City"}),
+]
+
+def make_sink():
+    """Stand-in for send_message that records messages instead of sending them"""
+    sent: List[CrossLanguageMessage] = []
+    
+    async def sink(message):
+        sent.append(message)
+    
+    return sink, sent
+
+@pytest.fixture(scope="module")
+def handler_agent():
+    """One agent shared by every handler case, with a recording send_message"""
+    agent = WeatherMonitoringAgent("test_weather_agent", "Test City")
+    agent.send_message, sent = make_sink()
+    return agent, sent
+
+@pytest.fixture
+def sink_agent(handler_agent):
+    """The shared handler agent, reset to one reading, one alert and default thresholds"""
+    agent, sent = handler_agent
+    default_thresholds = dict(agent.alert_thresholds)
+    sent.clear()
+    agent.weather_data = [agent.simulator.generate_hourly_reading()]
+    agent.active_alerts = [WeatherAlert(
+        alert_id="test_alert_001",
+        timestamp=_BASE_ISO,
+        alert_type="temperature",
+        severity="high",
+        message="Test alert",
+        recommendations=["Test action"],
+        affected_services=["shelter"]
+    )]
+    yield agent, sent
+    agent.alert_thresholds = default_thresholds
+
+@pytest.fixture(scope="class")
+def agent_cls():
+    """One agent per test class, with a recording send_message"""
+    agent = WeatherMonitoringAgent("test_weather_agent", "Test City")
+    agent.send_message, sent = make_sink()
+    return agent, sent
+
+@pytest.fixture(scope="session")
+def month_of_readings():
+    """One month of hourly readings, oldest first, built once for the performance tests"""
+    return [
+        WeatherReading(
+            timestamp=(_BASE_TIME - timedelta(hours=i)).isoformat(),
+            temperature_f=70.0 + (i % 48) - 24,  # Temperature cycle
+            humidity_percent=60.0 + (i % 20) - 10,
+            precipitation_inches=0.1 if i % 12 == 0 else 0.0,
+            wind_speed_mph=10.0 + (i % 16),
+            wind_direction="N",
+            pressure_mb=1013.0 + (i % 10) - 5,
+            visibility_miles=10.0,
+            conditions="Clear",
+            uv_index=5
+        )
+        for i in reversed(range(24 * 30))  # 30 days * 24 hours
+    ]
+
 class TestWeatherSimulator:
     """Test the weather simulation functionality"""
     
@@ -52,16 +153,8 @@ class TestWeatherSimulator:
         reading = self.simulator.generate_hourly_reading()
         
         # Verify all required fields are present
-        assert hasattr(reading, 'timestamp')
-        assert hasattr(reading, 'temperature_f')
-        assert hasattr(reading, 'humidity_percent')
-        assert hasattr(reading, 'precipitation_inches')
-        assert hasattr(reading, 'wind_speed_mph')
-        assert hasattr(reading, 'wind_direction')
-        assert hasattr(reading, 'pressure_mb')
-        assert hasattr(reading, 'visibility_miles')
-        assert hasattr(reading, 'conditions')
-        assert hasattr(reading, 'uv_index')
+        missing = [f.name for f in dataclasses.fields(WeatherReading) if not hasattr(reading, f.name)]
+        assert not missing, f"Reading is missing fields: {missing}"
         
         # Verify realistic value ranges
         assert 0 <= reading.temperature_f <= 150
@@ -73,16 +166,11 @@ class TestWeatherSimulator:
         assert 0 <= reading.uv_index <= 11
         
         # Verify wind direction is valid
-        valid_directions = ['N', 'NNE', 'NE', 'ENE', 'E', 'ESE', 'SE', 'SSE', 
-                           'S', 'SSW', 'SW', 'WSW', 'W', 'WNW', 'NW', 'NNW']
-        assert reading.wind_direction in valid_directions
+        assert reading.wind_direction in _VALID_DIRECTIONS
     
     def test_generate_multiple_readings(self):
         """Test generating multiple readings with time offsets"""
-        readings = []
-        for i in range(5):
-            reading = self.simulator.generate_hourly_reading(hour_offset=i)
-            readings.append(reading)
+        readings = [self.simulator.generate_hourly_reading(hour_offset=i) for i in range(5)]
         
         assert len(readings) == 5
         
@@ -90,6 +178,18 @@ class TestWeatherSimulator:
         timestamps = [r.timestamp for r in readings]
         assert len(set(timestamps)) == 5  # All unique
     
+    def test_generate_batch(self):
+        """Test generating a batch of consecutive hourly readings"""
+        readings = self.simulator.generate_batch(24, start_offset=2)
+        
+        assert len(readings) == 24
+        assert all(isinstance(r, WeatherReading) for r in readings)
+        
+        # Readings are one hour apart, in order
+        times = [datetime.fromisoformat(r.timestamp) for r in readings]
+        assert times == sorted(times)
+        assert round((times[-1] - times[0]) / timedelta(hours=1)) == 23
+    
     def test_weather_reading_serialization(self):
         """Test weather reading serialization/deserialization"""
         original_reading = self.simulator.generate_hourly_reading()
@@ -113,7 +213,7 @@ class TestWeatherAlert:
         """Test weather alert creation and serialization"""
         alert = WeatherAlert(
             alert_id="test_alert_001",
-            timestamp=datetime.now(timezone.utc).isoformat(),
+            timestamp=_BASE_ISO,
             alert_type="temperature",
             severity="high",
             message="Test alert message",
@@ -136,9 +236,24 @@ class TestWeatherAlert:
 class TestWeatherMonitoringAgent:
     """Test the main weather monitoring agent"""
     
-    def setup_method(self):
-        """Set up test fixtures"""
-        self.agent = WeatherMonitoringAgent("test_weather_agent", "Test City")
+    @pytest.fixture(autouse=True)
+    async def _reset(self, agent_cls):
+        """Bind the class agent to the test, then reset the state tests mutate"""
+        self.agent, self.sent = agent_cls
+        yield
+        # A monitoring loop left running would keep adding readings under later tests
+        task = self.agent.monitoring_task
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self.agent.weather_data = []  # Also clears _analysis_cache
+        self.agent.active_alerts.clear()
+        self.agent.monitoring_active = False
+        self.agent.monitoring_task = None
+        self.sent.clear()
     
     def test_agent_initialization(self):
         """Test agent initialization"""
@@ -176,11 +291,16 @@ class TestWeatherMonitoringAgent:
     @pytest.mark.asyncio
     async def test_agent_initialization_process(self):
         """Test agent initialization process"""
-        await self.agent.initialize()
-        
-        # Should have one initial reading
-        assert len(self.agent.weather_data) == 1
-        assert isinstance(self.agent.weather_data[0], WeatherReading)
+        # initialize() can switch off real weather, so it gets an agent of its own
+        agent = WeatherMonitoringAgent("test_weather_agent", "Test City")
+        try:
+            await agent.initialize()
+            
+            # Should have one initial reading
+            assert len(agent.weather_data) == 1
+            assert isinstance(agent.weather_data[0], WeatherReading)
+        finally:
+            await agent.cleanup()
     
     @pytest.mark.asyncio
     async def test_start_stop_monitoring(self):
@@ -208,7 +328,7 @@ class TestWeatherMonitoringAgent:
         """Test weather alert threshold checking"""
         # Create a reading that should trigger temperature alert
         high_temp_reading = WeatherReading(
-            timestamp=datetime.now(timezone.utc).isoformat(),
+            timestamp=_BASE_ISO,
             temperature_f=100.0,  # Above threshold
             humidity_percent=50.0,
             precipitation_inches=0.0,
@@ -220,28 +340,23 @@ class TestWeatherMonitoringAgent:
             uv_index=8
         )
         
-        # Mock the send_message method to avoid actual message sending
-        with patch.object(self.agent, 'send_message', new_callable=AsyncMock):
-            # This would be called in the monitoring loop
-            initial_alert_count = len(self.agent.active_alerts)
-            
-            # Manually test alert creation logic
-            temp_alert = self.agent._create_temperature_alert(high_temp_reading, 'high')
-            assert temp_alert.alert_type == 'temperature'
-            assert temp_alert.severity in ['high', 'extreme']
-            assert 'heat warning' in temp_alert.message.lower()
-            assert len(temp_alert.recommendations) > 0
-            assert 'shelter' in temp_alert.affected_services
+        # This would be called in the monitoring loop
+        initial_alert_count = len(self.agent.active_alerts)
+        
+        # Manually test alert creation logic
+        temp_alert = self.agent._create_temperature_alert(high_temp_reading, 'high')
+        assert temp_alert.alert_type == 'temperature'
+        assert temp_alert.severity in ['high', 'extreme']
+        assert 'heat warning' in temp_alert.message.lower()
+        assert len(temp_alert.recommendations) > 0
+        assert 'shelter' in temp_alert.affected_services
     
     def test_weather_analysis(self):
         """Test weather analysis functionality"""
         # Add some test data
-        test_readings = []
-        base_time = datetime.now(timezone.utc)
-        
-        for i in range(24):  # 24 hours of data
-            reading = WeatherReading(
-                timestamp=(base_time - timedelta(hours=23-i)).isoformat(),
+        self.agent.weather_data = [
+            WeatherReading(
+                timestamp=(_BASE_TIME - timedelta(hours=23-i)).isoformat(),
                 temperature_f=70.0 + i,  # Rising temperature
                 humidity_percent=60.0,
                 precipitation_inches=0.1 if i % 6 == 0 else 0.0,  # Occasional rain
@@ -252,9 +367,8 @@ class TestWeatherMonitoringAgent:
                 conditions="Clear",
                 uv_index=5
             )
-            test_readings.append(reading)
-        
-        self.agent.weather_data = test_readings
+            for i in range(24)  # 24 hours of data
+        ]
         
         # Test analysis
         analysis = self.agent.get_weather_analysis(hours_back=24)
@@ -277,6 +391,67 @@ class TestWeatherMonitoringAgent:
         assert precip_analysis['total'] == 0.4  # 4 rain events * 0.1 inches
         assert precip_analysis['hours_with_precip'] == 4
     
+    def test_weather_analysis_stable_trend(self):
+        """Test that a change within the threshold reports a stable trend"""
+        self.agent.weather_data = [
+            WeatherReading(
+                timestamp=(_BASE_TIME - timedelta(hours=2-i)).isoformat(),
+                temperature_f=temperature, humidity_percent=60.0, precipitation_inches=0.0,
+                wind_speed_mph=10.0, wind_direction="N", pressure_mb=1013.0,
+                visibility_miles=10.0, conditions="Clear", uv_index=5
+            )
+            for i, temperature in enumerate((70.0, 71.5, 70.3))
+        ]
+        
+        analysis = self.agent.get_weather_analysis(hours_back=24)
+        assert analysis['temperature']['trend'] == 'stable'
+    
+    def test_weather_analysis_cache(self):
+        """Test repeated analyses reuse the cached result until the data changes"""
+        self.agent.weather_data = self.agent.simulator.generate_batch(3, start_offset=-2)
+        computed = []
+        compute = self.agent._compute_analysis
+        self.agent._compute_analysis = lambda hours_back: computed.append(hours_back) or compute(hours_back)
+        
+        first = self.agent.get_weather_analysis(hours_back=24)
+        second = self.agent.get_weather_analysis(hours_back=24)
+        assert second == first and second is not first
+        self.agent.get_weather_analysis(hours_back=12)
+        assert computed == [24, 12]
+        
+        # Callers get copies; editing one does not change later results
+        first['temperature']['avg'] = -999
+        first['conditions']['conditions_summary'].clear()
+        assert self.agent.get_weather_analysis(hours_back=24) == second
+        assert computed == [24, 12]
+        
+        # Replacing the readings drops cached results, even when the new list has
+        # the same length and newest timestamp
+        self.agent.weather_data = [dataclasses.replace(r, temperature_f=r.temperature_f + 10)
+                                   for r in self.agent.weather_data]
+        replaced = self.agent.get_weather_analysis(hours_back=24)
+        assert computed == [24, 12, 24]
+        assert replaced['temperature']['max'] == second['temperature']['max'] + 10
+        
+        # A new reading changes the data fingerprint
+        self.agent.weather_data.append(self.agent.simulator.generate_hourly_reading())
+        refreshed = self.agent.get_weather_analysis(hours_back=24)
+        assert computed == [24, 12, 24, 24]
+        assert refreshed['data_points'] == second['data_points'] + 1
+    
+    def test_readings_kept_in_timestamp_order(self):
+        """Test that a lagging reading is slotted into place so window lookups stay correct"""
+        simulator = self.agent.simulator
+        now_reading = simulator.generate_hourly_reading(0)
+        lagging_reading = simulator.generate_hourly_reading(-2)  # e.g. a NOAA observation time
+        old_reading = simulator.generate_hourly_reading(-30)
+        
+        for reading in (now_reading, lagging_reading, old_reading):
+            self.agent._record_reading(reading)
+        
+        assert self.agent.weather_data == [old_reading, lagging_reading, now_reading]
+        assert self.agent._readings_since(24) == [lagging_reading, now_reading]
+    
     def test_weather_analysis_no_data(self):
         """Test weather analysis with no data"""
         # Clear any existing data
@@ -290,19 +465,19 @@ class TestWeatherMonitoringAgent:
         """Test weather conditions summary"""
         test_readings = [
             WeatherReading(
-                timestamp=datetime.now(timezone.utc).isoformat(),
+                timestamp=_BASE_ISO,
                 temperature_f=70.0, humidity_percent=60.0, precipitation_inches=0.0,
                 wind_speed_mph=10.0, wind_direction="N", pressure_mb=1013.0,
                 visibility_miles=10.0, conditions="Clear", uv_index=5
             ),
             WeatherReading(
-                timestamp=datetime.now(timezone.utc).isoformat(),
+                timestamp=_BASE_ISO,
                 temperature_f=75.0, humidity_percent=65.0, precipitation_inches=0.2,
                 wind_speed_mph=15.0, wind_direction="S", pressure_mb=1010.0,
                 visibility_miles=8.0, conditions="Rain", uv_index=3
             ),
             WeatherReading(
-                timestamp=datetime.now(timezone.utc).isoformat(),
+                timestamp=_BASE_ISO,
                 temperature_f=72.0, humidity_percent=62.0, precipitation_inches=0.0,
                 wind_speed_mph=12.0, wind_direction="W", pressure_mb=1015.0,
                 visibility_miles=10.0, conditions="Clear", uv_index=6
@@ -316,213 +491,60 @@ class TestWeatherMonitoringAgent:
     @pytest.mark.asyncio
     async def test_message_handlers(self):
         """Test message handling functionality"""
-        # Mock the send_message method
-        with patch.object(self.agent, 'send_message', new_callable=AsyncMock) as mock_send:
-            # Test start monitoring message
-            start_message = CrossLanguageMessage(
-                msg_id="test_start_001",
-                msg_type="start_monitoring",
-                source={"agentId": "test_sender", "language": "javascript", "runtime": "nodejs"},
-                destination={"agentId": self.agent.agent_id},
-                payload={"duration_hours": 48},
-                metadata={"priority": "normal", "retryCount": 0, "maxRetries": 0, "timeoutMs": 5000}
-            )
-            
-            await self.agent.handle_start_monitoring(start_message)
-            
-            # Verify monitoring started
-            assert self.agent.monitoring_active is True
-            
-            # Verify response was sent
-            mock_send.assert_called_once()
-            call_args = mock_send.call_args[0][0]
-            assert call_args.msg_type == "monitoring_response"
-            assert call_args.payload['success'] is True
-            
-            # Reset mock
-            mock_send.reset_mock()
-            
-            # Test stop monitoring message
-            stop_message = CrossLanguageMessage(
-                msg_id="test_stop_001",
-                msg_type="stop_monitoring",
-                source={"agentId": "test_sender", "language": "javascript", "runtime": "nodejs"},
-                destination={"agentId": self.agent.agent_id},
-                payload={},
-                metadata={"priority": "normal", "retryCount": 0, "maxRetries": 0, "timeoutMs": 5000}
-            )
-            
-            await self.agent.handle_stop_monitoring(stop_message)
-            
-            # Verify monitoring stopped
-            assert self.agent.monitoring_active is False
-            
-            # Verify response was sent
-            mock_send.assert_called_once()
-            call_args = mock_send.call_args[0][0]
-            assert call_args.msg_type == "monitoring_response"
-            assert call_args.payload['success'] is True
-    
-    @pytest.mark.asyncio
-    async def test_current_weather_handler(self):
-        """Test current weather request handler"""
-        # Add some test data
-        await self.agent.initialize()
+        # Test start monitoring message
+        start_message = make_msg("start_monitoring", {"duration_hours": 48}, self.agent.agent_id, msg_id="test_start_001")
         
-        with patch.object(self.agent, 'send_message', new_callable=AsyncMock) as mock_send:
-            current_weather_message = CrossLanguageMessage(
-                msg_id="test_current_001",
-                msg_type="get_current_weather",
-                source={"agentId": "test_sender", "language": "javascript", "runtime": "nodejs"},
-                destination={"agentId": self.agent.agent_id},
-                payload={},
-                metadata={"priority": "normal", "retryCount": 0, "maxRetries": 0, "timeoutMs": 5000}
-            )
-            
-            await self.agent.handle_get_current_weather(current_weather_message)
-            
-            # Verify response was sent
-            mock_send.assert_called_once()
-            call_args = mock_send.call_args[0][0]
-            assert call_args.msg_type == "weather_response"
-            assert 'current_weather' in call_args.payload
-            assert call_args.payload['current_weather'] is not None
-            assert call_args.payload['location'] == "Test City"
-    
-    @pytest.mark.asyncio
-    async def test_weather_history_handler(self):
-        """Test weather history request handler"""
-        # Add some test data
-        await self.agent.initialize()
+        await self.agent.handle_start_monitoring(start_message)
         
-        with patch.object(self.agent, 'send_message', new_callable=AsyncMock) as mock_send:
-            history_message = CrossLanguageMessage(
-                msg_id="test_history_001",
-                msg_type="get_weather_history",
-                source={"agentId": "test_sender", "language": "javascript", "runtime": "nodejs"},
-                destination={"agentId": self.agent.agent_id},
-                payload={"hours_back": 12},
-                metadata={"priority": "normal", "retryCount": 0, "maxRetries": 0, "timeoutMs": 5000}
-            )
-            
-            await self.agent.handle_get_weather_history(history_message)
-            
-            # Verify response was sent
-            mock_send.assert_called_once()
-            call_args = mock_send.call_args[0][0]
-            assert call_args.msg_type == "weather_history_response"
-            assert 'weather_history' in call_args.payload
-            assert call_args.payload['hours_requested'] == 12
-    
-    @pytest.mark.asyncio
-    async def test_weather_forecast_handler(self):
-        """Test weather forecast request handler"""
-        with patch.object(self.agent, 'send_message', new_callable=AsyncMock) as mock_send:
-            forecast_message = CrossLanguageMessage(
-                msg_id="test_forecast_001",
-                msg_type="get_weather_forecast",
-                source={"agentId": "test_sender", "language": "javascript", "runtime": "nodejs"},
-                destination={"agentId": self.agent.agent_id},
-                payload={"hours_ahead": 6},
-                metadata={"priority": "normal", "retryCount": 0, "maxRetries": 0, "timeoutMs": 5000}
-            )
-            
-            await self.agent.handle_get_weather_forecast(forecast_message)
-            
-            # Verify response was sent
-            mock_send.assert_called_once()
-            call_args = mock_send.call_args[0][0]
-            assert call_args.msg_type == "weather_forecast_response"
-            assert 'forecast' in call_args.payload
-            assert len(call_args.payload['forecast']) == 6
-            assert call_args.payload['data_quality'] == "simulated"
-    
-    @pytest.mark.asyncio
-    async def test_weather_alerts_handler(self):
-        """Test weather alerts request handler"""
-        # Add a test alert
-        test_alert = WeatherAlert(
-            alert_id="test_alert_001",
-            timestamp=datetime.now(timezone.utc).isoformat(),
-            alert_type="temperature",
-            severity="high",
-            message="Test alert",
-            recommendations=["Test action"],
-            affected_services=["shelter"]
-        )
-        self.agent.active_alerts.append(test_alert)
-        
-        with patch.object(self.agent, 'send_message', new_callable=AsyncMock) as mock_send:
-            alerts_message = CrossLanguageMessage(
-                msg_id="test_alerts_001",
-                msg_type="get_weather_alerts",
-                source={"agentId": "test_sender", "language": "javascript", "runtime": "nodejs"},
-                destination={"agentId": self.agent.agent_id},
-                payload={},
-                metadata={"priority": "normal", "retryCount": 0, "maxRetries": 0, "timeoutMs": 5000}
-            )
-            
-            await self.agent.handle_get_weather_alerts(alerts_message)
-            
-            # Verify response was sent
-            mock_send.assert_called_once()
-            call_args = mock_send.call_args[0][0]
-            assert call_args.msg_type == "weather_alerts_response"
-            assert 'active_alerts' in call_args.payload
-            assert len(call_args.payload['active_alerts']) == 1
-            assert call_args.payload['alert_count'] == 1
+        # Verify monitoring started
+        assert self.agent.monitoring_active is True
+        
+        # Verify response was sent
+        assert len(self.sent) == 1
+        call_args = self.sent[0]
+        assert call_args.type == "monitoring_response"
+        assert call_args.payload['success'] is True
+        
+        # Clear captured messages
+        self.sent.clear()
+        
+        # Test stop monitoring message
+        stop_message = make_msg("stop_monitoring", {}, self.agent.agent_id, msg_id="test_stop_001")
+        
+        await self.agent.handle_stop_monitoring(stop_message)
+        
+        # Verify monitoring stopped
+        assert self.agent.monitoring_active is False
+        
+        # Verify response was sent
+        assert len(self.sent) == 1
+        call_args = self.sent[0]
+        assert call_args.type == "monitoring_response"
+        assert call_args.payload['success'] is True
     
     @pytest.mark.asyncio
-    async def test_update_alert_thresholds_handler(self):
-        """Test alert threshold update handler"""
-        original_temp_high = self.agent.alert_thresholds['temperature_high']
-        
-        with patch.object(self.agent, 'send_message', new_callable=AsyncMock) as mock_send:
-            update_message = CrossLanguageMessage(
-                msg_id="test_update_001",
-                msg_type="update_alert_thresholds",
-                source={"agentId": "test_sender", "language": "javascript", "runtime": "nodejs"},
-                destination={"agentId": self.agent.agent_id},
-                payload={"thresholds": {"temperature_high": 100.0, "wind_high": 35.0}},
-                metadata={"priority": "normal", "retryCount": 0, "maxRetries": 0, "timeoutMs": 5000}
-            )
-            
-            await self.agent.handle_update_alert_thresholds(update_message)
-            
+    @pytest.mark.parametrize(
+        "msg_type, handler_attr, payload, expected_response_type, payload_key, expected_values",
+        HANDLER_CASES,
+        ids=[case[0] for case in HANDLER_CASES]
+    )
+    async def test_handler(self, sink_agent, msg_type, handler_attr, payload,
+                           expected_response_type, payload_key, expected_values):
+        """Test that each request handler answers with its response type"""
+        agent, sent = sink_agent
+        await getattr(agent, handler_attr)(make_msg(msg_type, payload, agent.agent_id))
+        
+        # Verify response was sent
+        assert len(sent) == 1
+        response = sent[0]
+        assert response.type == expected_response_type
+        assert response.payload.get(payload_key) is not None
+        for key, expected in expected_values.items():
+            assert response.payload[key] == expected
+        
+        if msg_type == "update_alert_thresholds":
             # Verify thresholds were updated
-            assert self.agent.alert_thresholds['temperature_high'] == 100.0
-            assert self.agent.alert_thresholds['wind_high'] == 35.0
-            
-            # Verify response was sent
-            mock_send.assert_called_once()
-            call_args = mock_send.call_args[0][0]
-            assert call_args.msg_type == "thresholds_update_response"
-            assert call_args.payload['success'] is True
-    
-    @pytest.mark.asyncio
-    async def test_weather_analysis_handler(self):
-        """Test weather analysis request handler"""
-        # Add some test data
-        await self.agent.initialize()
-        
-        with patch.object(self.agent, 'send_message', new_callable=AsyncMock) as mock_send:
-            analysis_message = CrossLanguageMessage(
-                msg_id="test_analysis_001",
-                msg_type="weather_analysis_request",
-                source={"agentId": "test_sender", "language": "javascript", "runtime": "nodejs"},
-                destination={"agentId": self.agent.agent_id},
-                payload={"hours_back": 24},
-                metadata={"priority": "normal", "retryCount": 0, "maxRetries": 0, "timeoutMs": 5000}
-            )
-            
-            await self.agent.handle_weather_analysis_request(analysis_message)
-            
-            # Verify response was sent
-            mock_send.assert_called_once()
-            call_args = mock_send.call_args[0][0]
-            assert call_args.msg_type == "weather_analysis_response"
-            assert 'analysis' in call_args.payload
-            assert call_args.payload['location'] == "Test City"
+            assert agent.alert_thresholds.items() >= payload["thresholds"].items()
     
     @pytest.mark.asyncio
     async def test_cleanup(self):
@@ -541,6 +563,7 @@ class TestIntegrationScenarios:
     def setup_method(self):
         """Set up test fixtures"""
         self.agent = WeatherMonitoringAgent("integration_test_agent", "Integration City")
+        self.agent.send_message, self.sent = make_sink()
     
     @pytest.mark.asyncio
     async def test_extreme_weather_scenario(self):
@@ -549,7 +572,7 @@ class TestIntegrationScenarios:
         
         # Create extreme weather reading
         extreme_reading = WeatherReading(
-            timestamp=datetime.now(timezone.utc).isoformat(),
+            timestamp=_BASE_ISO,
             temperature_f=105.0,  # Extreme heat
             humidity_percent=85.0,  # High humidity
             precipitation_inches=1.5,  # Heavy rain
@@ -563,9 +586,8 @@ class TestIntegrationScenarios:
         
         self.agent.weather_data.append(extreme_reading)
         
-        with patch.object(self.agent, 'send_message', new_callable=AsyncMock):
-            # Simulate alert checking
-            await self.agent._check_weather_alerts(extreme_reading)
+        # Simulate alert checking
+        await self.agent._check_weather_alerts(extreme_reading)
         
         # Should generate multiple alerts
         assert len(self.agent.active_alerts) > 0
@@ -577,16 +599,33 @@ class TestIntegrationScenarios:
         assert 'wind' in alert_types
         assert 'visibility' in alert_types
     
+    @pytest.mark.asyncio
+    async def test_batch_alert_checking(self):
+        """Test checking several readings for alerts in one pass"""
+        calm, hot, windy = (
+            WeatherReading(
+                timestamp=_BASE_ISO,
+                temperature_f=temperature, humidity_percent=50.0, precipitation_inches=0.0,
+                wind_speed_mph=wind, wind_direction="N", pressure_mb=1013.0,
+                visibility_miles=10.0, conditions="Clear", uv_index=3
+            )
+            for temperature, wind in ((70.0, 5.0), (100.0, 5.0), (70.0, 35.0))
+        )
+        
+        await self.agent._check_weather_alerts_batch([calm, hot, windy])
+        
+        # One alert per triggering reading, each broadcast in order
+        assert [alert.alert_type for alert in self.agent.active_alerts] == ['temperature', 'wind']
+        assert len(self.sent) == 2
+    
     @pytest.mark.asyncio
     async def test_week_long_monitoring_simulation(self):
         """Test simulated week-long monitoring scenario"""
         await self.agent.initialize()
         
-        # Simulate a week of data collection (accelerated)
-        for day in range(7):
-            for hour in range(24):
-                reading = self.agent.simulator.generate_hourly_reading(hour_offset=day*24 + hour)
-                self.agent.weather_data.append(reading)
+        # Simulate a week of data collection (accelerated): the past week's hourly
+        # readings, oldest first, ahead of the reading taken at initialization
+        self.agent.weather_data[:0] = self.agent.simulator.generate_batch(7 * 24, start_offset=-7 * 24)
         
         # Verify we have a week's worth of data
         assert len(self.agent.weather_data) > 168  # More than 7 days worth (initial + generated)
@@ -606,85 +645,67 @@ class TestIntegrationScenarios:
         """Test complete cross-language communication flow"""
         await self.agent.initialize()
         
-        with patch.object(self.agent, 'send_message', new_callable=AsyncMock) as mock_send:
-            # Simulate receiving a request from a JavaScript agent
-            js_request = CrossLanguageMessage(
-                msg_id="js_weather_request_001",
-                msg_type="get_current_weather",
-                source={"agentId": "shelter_management_js", "language": "javascript", "runtime": "nodejs"},
-                destination={"agentId": self.agent.agent_id},
-                payload={},
-                metadata={"priority": "normal", "retryCount": 0, "maxRetries": 0, "timeoutMs": 5000}
-            )
-            
-            # Process the request
-            await self.agent.handle_get_current_weather(js_request)
-            
-            # Verify response
-            mock_send.assert_called_once()
-            response = mock_send.call_args[0][0]
-            
-            assert response.msg_type == "weather_response"
-            assert response.destination == js_request.source
-            assert response.metadata['correlationId'] == js_request.id
-            assert 'current_weather' in response.payload
-            
-            # Simulate weather alert broadcast
-            mock_send.reset_mock()
-            
-            alert_reading = WeatherReading(
-                timestamp=datetime.now(timezone.utc).isoformat(),
-                temperature_f=100.0, humidity_percent=50.0, precipitation_inches=0.0,
-                wind_speed_mph=5.0, wind_direction="N", pressure_mb=1013.0,
-                visibility_miles=10.0, conditions="Hot", uv_index=8
-            )
-            
-            await self.agent._check_weather_alerts(alert_reading)
-            
-            # Should have sent alert broadcast
-            assert mock_send.call_count > 0
-            
-            # Find the alert message
-            alert_calls = [call for call in mock_send.call_args_list 
-                          if call[0][0].msg_type == "weather_alert"]
-            assert len(alert_calls) > 0
-            
-            alert_message = alert_calls[0][0][0]
-            assert alert_message.destination == {"broadcast": True}
-            assert alert_message.metadata['priority'] == "high"
+        # Simulate receiving a request from a JavaScript agent
+        js_request = CrossLanguageMessage(
+            msg_id="js_weather_request_001",
+            msg_type="get_current_weather",
+            source={"agentId": "shelter_management_js", "language": "javascript", "runtime": "nodejs"},
+            destination={"agentId": self.agent.agent_id},
+            payload={},
+            metadata={"priority": "normal", "retryCount": 0, "maxRetries": 0, "timeoutMs": 5000}
+        )
+        
+        # Process the request
+        await self.agent.handle_get_current_weather(js_request)
+        
+        # Verify response
+        assert len(self.sent) == 1
+        response = self.sent[0]
+        
+        assert response.type == "weather_response"
+        assert response.destination == js_request.source
+        assert response.metadata['correlationId'] == js_request.id
+        assert 'current_weather' in response.payload
+        
+        # Simulate weather alert broadcast
+        self.sent.clear()
+        
+        alert_reading = WeatherReading(
+            timestamp=_BASE_ISO,
+            temperature_f=100.0, humidity_percent=50.0, precipitation_inches=0.0,
+            wind_speed_mph=5.0, wind_direction="N", pressure_mb=1013.0,
+            visibility_miles=10.0, conditions="Hot", uv_index=8
+        )
+        
+        await self.agent._check_weather_alerts(alert_reading)
+        
+        # Should have sent alert broadcast
+        assert len(self.sent) > 0
+        
+        # Find the alert message
+        alert_calls = [message for message in self.sent
+                       if message.type == "weather_alert"]
+        assert len(alert_calls) > 0
+        
+        alert_message = alert_calls[0]
+        assert alert_message.destination == {"broadcast": True}
+        assert alert_message.metadata['priority'] == "high"
 
 # Performance and load testing
+@pytest.mark.perf
 class TestPerformanceAndLoad:
     """Test performance characteristics and load handling"""
     
     def setup_method(self):
         """Set up test fixtures"""
         self.agent = WeatherMonitoringAgent("performance_test_agent", "Performance City")
+        self.agent.send_message, self.sent = make_sink()
     
-    def test_large_dataset_analysis_performance(self):
+    def test_large_dataset_analysis_performance(self, month_of_readings):
         """Test analysis performance with large datasets"""
         import time
         
-        # Generate large dataset (1 month of hourly data)
-        large_dataset = []
-        base_time = datetime.now(timezone.utc)
-        
-        for i in range(24 * 30):  # 30 days * 24 hours
-            reading = WeatherReading(
-                timestamp=(base_time - timedelta(hours=i)).isoformat(),
-                temperature_f=70.0 + (i % 48) - 24,  # Temperature cycle
-                humidity_percent=60.0 + (i % 20) - 10,
-                precipitation_inches=0.1 if i % 12 == 0 else 0.0,
-                wind_speed_mph=10.0 + (i % 16),
-                wind_direction="N",
-                pressure_mb=1013.0 + (i % 10) - 5,
-                visibility_miles=10.0,
-                conditions="Clear",
-                uv_index=5
-            )
-            large_dataset.append(reading)
-        
-        self.agent.weather_data = large_dataset
+        self.agent.weather_data = list(month_of_readings)
         
         # Time the analysis
         start_time = time.time()
@@ -706,12 +727,10 @@ class TestPerformanceAndLoad:
         """Test handling multiple concurrent messages"""
         await self.agent.initialize()
         
-        with patch.object(self.agent, 'send_message', new_callable=AsyncMock):
-            # Create multiple concurrent requests
-            concurrent_requests = []
-            
+        # Execute all requests concurrently
+        async with asyncio.TaskGroup() as tg:
             for i in range(10):
-                request = self.agent.handle_get_current_weather(
+                tg.create_task(self.agent.handle_get_current_weather(
                     CrossLanguageMessage(
                         msg_id=f"concurrent_request_{i}",
                         msg_type="get_current_weather",
@@ -720,15 +739,10 @@ class TestPerformanceAndLoad:
                         payload={},
                         metadata={"priority": "normal", "retryCount": 0, "maxRetries": 0, "timeoutMs": 5000}
                     )
-                )
-                concurrent_requests.append(request)
-            
-            # Execute all requests concurrently
-            await asyncio.gather(*concurrent_requests)
-            
-            # All requests should complete without error
-            # (If we reach this point, no exceptions were raised)
-            assert True
+                ))
+        
+        # All requests should complete without error, each with one response
+        assert len(self.sent) == 10
 
 # Run the tests
 if __name__ == "__main__":
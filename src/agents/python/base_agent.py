@@ -25,16 +25,33 @@ Usage:
 """
 
 import asyncio
+import itertools
 import json
 import sys
 import time
 import traceback
 import argparse
 import logging
+import os
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional, Callable, List
+from typing import Dict, Any, Optional, Callable, Coroutine, List
 from abc import ABC, abstractmethod
 
+# orjson is optional; every message to and from the runtime goes through the
+# JSON codec, so the faster encoder is used when it is installed
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# uvloop is optional; agents run their event loop on it when it is installed
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -42,9 +59,75 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Longest single message line the stdin reader accepts (asyncio's default is 64 KiB)
+STDIN_LINE_LIMIT = 16 * 1024 * 1024
+
+# Bytes requested from stdin per read; every complete line in a chunk is handled
+# before the loop waits on stdin again
+STDIN_READ_SIZE = 64 * 1024
+
+# AGENT_PROTOCOL=framed switches stdio from newline-delimited JSON to messages
+# prefixed with their byte length (4 bytes, little-endian), for runtimes that
+# speak it; both directions use the same framing
+FRAMED_PROTOCOL = os.environ.get("AGENT_PROTOCOL", "").lower() == "framed"
+
+# Message metadata shared by the built-in messages; treat as read-only and copy
+# with dict(_META_..., key=value) when a message needs extra fields
+_META_NORMAL: Dict[str, Any] = {"priority": "normal", "retryCount": 0, "maxRetries": 0, "timeoutMs": 5000}
+_META_HIGH: Dict[str, Any] = {"priority": "high", "retryCount": 0, "maxRetries": 0, "timeoutMs": 5000}
+_META_LOW: Dict[str, Any] = {"priority": "low", "retryCount": 0, "maxRetries": 0, "timeoutMs": 1000}
+
+# Last millisecond _now_iso formatted, and its ISO string
+_last_ts_ms = 0
+_last_ts_str = ""
+
+def _now_iso() -> str:
+    """Current UTC time as an ISO 8601 string, formatted at most once per millisecond"""
+    global _last_ts_ms, _last_ts_str
+    ms = time.time_ns() // 1_000_000
+    if ms != _last_ts_ms:
+        seconds, millis = divmod(ms, 1000)
+        _last_ts_str = datetime.fromtimestamp(seconds, timezone.utc).replace(
+            microsecond=millis * 1000).isoformat(timespec='milliseconds')
+        _last_ts_ms = ms
+    return _last_ts_str
+
+def _json_dumpb(obj: Any) -> bytes:
+    """Serialize to newline-terminated UTF-8 JSON, with orjson when it is installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(obj) + "\n").encode()
+
+def _preview(line: Any, limit: int = 100) -> str:
+    """First characters of a raw stdin message, as text, for log output"""
+    if isinstance(line, (bytes, bytearray)):
+        line = bytes(line[:limit]).decode(errors='replace')
+    return line[:limit]
+
+def _split_template(obj: Any, slots: List[bytes]) -> List[bytes]:
+    """Encode obj once and split the bytes around each placeholder in slots, in order"""
+    rest = _json_dumpb(obj)
+    parts = []
+    for slot in slots:
+        head, rest = rest.split(slot, 1)
+        parts.append(head)
+    parts.append(rest)
+    return parts
+
+def _json_loads(text: str) -> Any:
+    """Parse a JSON string, with orjson when it is installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(text)
+    return json.loads(text)
+
+# Fields every inbound message must carry; timestamp is optional
+_REQUIRED_MESSAGE_FIELDS = ('id', 'type', 'source', 'destination', 'payload', 'metadata')
+
 class CrossLanguageMessage:
     """Represents a message in the cross-language communication protocol"""
     
+    __slots__ = ('id', 'type', 'timestamp', 'source', 'destination', 'payload', 'metadata')
+    
     def __init__(self, 
                  msg_id: str,
                  msg_type: str,
@@ -54,7 +137,7 @@ class CrossLanguageMessage:
                  metadata: Dict[str, Any]):
         self.id = msg_id
         self.type = msg_type
-        self.timestamp = datetime.now(timezone.utc).isoformat()
+        self.timestamp = _now_iso()
         self.source = source
         self.destination = destination
         self.payload = payload
@@ -74,28 +157,100 @@ class CrossLanguageMessage:
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'CrossLanguageMessage':
-        """Create message from dictionary"""
-        return cls(
-            data['id'],
-            data['type'],
-            data['source'],
-            data['destination'],
-            data['payload'],
-            data['metadata']
-        )
+        """Create message from dictionary, keeping the sender's timestamp"""
+        try:
+            msg_id, msg_type = data['id'], data['type']
+            source, destination = data['source'], data['destination']
+            payload, metadata = data['payload'], data['metadata']
+        except KeyError:
+            missing = [field for field in _REQUIRED_MESSAGE_FIELDS if field not in data]
+            raise ValueError(f"Message is missing required fields: {', '.join(missing)}") from None
+        
+        # Bypasses __init__, which would stamp the message with the current time
+        message = cls.__new__(cls)
+        message.id = msg_id
+        message.type = msg_type
+        message.timestamp = data.get('timestamp') or _now_iso()
+        message.source = source
+        message.destination = destination
+        message.payload = payload
+        message.metadata = metadata
+        return message
 
 class BaseAgent(ABC):
-    """Base class for Python agents in the multi-language runtime"""
+    """Base class for Python agents in the multi-language runtime
+    
+    Handlers that fan out to several independent coroutines should run them
+    in an asyncio.TaskGroup, or use asyncio.as_completed when results should
+    be handled as they arrive, rather than waiting on one asyncio.gather.
+    
+    The framework's own per-agent state lives in slots. Subclasses that do not
+    declare __slots__ still get a __dict__ for their own attributes.
+    """
+    
+    __slots__ = (
+        'agent_id', 'name', 'version',
+        '_started_wall', '_started_ns', '_started_iso', '_last_heartbeat_ns',
+        '_status_template', 'message_count', 'error_count', 'is_running',
+        '_stdin_reader', '_stdin_buffer', '_outbound', '_writer_task',
+        '_source', '_broadcast_dest', '_id_seq', '_id_prefixes', '_heartbeat_parts',
+        'message_handlers', 'state'
+    )
     
     def __init__(self, agent_id: str, name: str, version: str):
         self.agent_id = agent_id
         self.name = name
         self.version = version
-        self.started_at = datetime.now(timezone.utc)
-        self.last_heartbeat = datetime.now(timezone.utc)
+        # Start and last-activity times as monotonic nanoseconds; wall-clock
+        # datetimes are only derived when status is reported
+        self._started_wall = time.time()
+        self._started_ns = time.monotonic_ns()
+        self._started_iso = datetime.fromtimestamp(self._started_wall, timezone.utc).isoformat()
+        self._last_heartbeat_ns = self._started_ns
+        
+        # Status fields that never change; _status_dict copies and fills in the rest
+        self._status_template = {
+            "agent_id": agent_id,
+            "name": name,
+            "version": version,
+            "started_at": self._started_iso
+        }
         self.message_count = 0
         self.error_count = 0
         self.is_running = False
+        self._stdin_reader: Optional[asyncio.StreamReader] = None
+        self._stdin_buffer = bytearray()  # Partial line left over from the last stdin read
+        self._outbound: Optional[asyncio.Queue] = None  # Encoded messages awaiting the writer task
+        self._writer_task: Optional[asyncio.Task] = None
+        
+        # Invariant source and broadcast destination shared by every outgoing message
+        self._source = {"agentId": agent_id, "language": "python", "runtime": "python3"}
+        self._broadcast_dest = {"broadcast": True}
+        
+        # Outgoing message IDs are a per-type prefix plus a per-agent counter,
+        # so they stay unique even when several are sent within a millisecond
+        self._id_seq = itertools.count(1)
+        self._id_prefixes = {
+            kind: f"{kind}_{agent_id}_"
+            for kind in ("ready", "goodbye", "error", "heartbeat", "pong", "status")
+        }
+        
+        # Heartbeats differ only in ID, timestamp, uptime and counters, so the rest
+        # is encoded once and send_heartbeat splices fresh values between the pieces
+        self._heartbeat_parts = _split_template({
+            'id': self._id_prefixes["heartbeat"] + "@@seq@@",
+            'timestamp': "@@ts@@",
+            'type': "heartbeat",
+            'source': self._source,
+            'destination': self._broadcast_dest,
+            'payload': {
+                "status": "healthy",
+                "uptime": "@@uptime@@",
+                "message_count": "@@messages@@",
+                "error_count": "@@errors@@"
+            },
+            'metadata': _META_LOW
+        }, [b'@@seq@@', b'@@ts@@', b'"@@uptime@@"', b'"@@messages@@"', b'"@@errors@@"'])
         
         # Message handlers registry
         self.message_handlers: Dict[str, Callable] = {}
@@ -106,6 +261,25 @@ class BaseAgent(ABC):
         
         logger.info(f"🐍 Initialized Python agent: {self.name} ({self.agent_id})")
     
+    @property
+    def started_at(self) -> datetime:
+        """When the agent was created (UTC)"""
+        return datetime.fromtimestamp(self._started_wall, timezone.utc)
+    
+    @property
+    def last_heartbeat(self) -> datetime:
+        """When the agent last processed a message (UTC)"""
+        elapsed = (self._last_heartbeat_ns - self._started_ns) / 1e9
+        return datetime.fromtimestamp(self._started_wall + elapsed, timezone.utc)
+    
+    def _next_msg_id(self, kind: str) -> str:
+        """Next unique ID for an agent-generated message of the given kind"""
+        return self._id_prefixes[kind] + str(next(self._id_seq))
+    
+    def _uptime_seconds(self) -> float:
+        """Seconds since the agent was created, from the monotonic clock"""
+        return (time.monotonic_ns() - self._started_ns) / 1e9
+    
     def register_default_handlers(self):
         """Register default message handlers"""
         self.message_handlers.update({
@@ -118,7 +292,7 @@ class BaseAgent(ABC):
     def register_handler(self, message_type: str, handler: Callable):
         """Register a custom message handler"""
         self.message_handlers[message_type] = handler
-        logger.debug(f"Registered handler for message type: {message_type}")
+        logger.debug("Registered handler for message type: %s", message_type)
     
     async def start(self):
         """Start the agent and begin message processing"""
@@ -126,6 +300,10 @@ class BaseAgent(ABC):
             self.is_running = True
             logger.info(f"🚀 Starting Python agent: {self.name}")
             
+            # Route outgoing messages through a single writer while running
+            self._outbound = asyncio.Queue()
+            self._writer_task = asyncio.create_task(self._writer_loop())
+            
             # Initialize agent-specific resources
             await self.initialize()
             
@@ -133,6 +311,7 @@ class BaseAgent(ABC):
             await self.send_ready_message()
             
             # Start message processing loop
+            await self._open_stdin_reader()
             await self.message_loop()
             
         except Exception as e:
@@ -140,6 +319,8 @@ class BaseAgent(ABC):
             self.error_count += 1
             await self.send_error_message(str(e))
             raise
+        finally:
+            await self._close_writer()
     
     async def stop(self):
         """Stop the agent and cleanup resources"""
@@ -173,45 +354,125 @@ class BaseAgent(ABC):
         
         while self.is_running:
             try:
-                # Read message from stdin
-                line = await self.read_stdin_line()
-                if not line:
-                    await asyncio.sleep(0.1)
-                    continue
+                # Read every message stdin has ready
+                messages = await self.read_stdin_messages()
+                if messages is None:
+                    logger.info(f"📭 stdin closed, stopping message loop for agent: {self.name}")
+                    break
                 
-                # Parse message
-                try:
-                    message_data = json.loads(line)
-                    message = CrossLanguageMessage.from_dict(message_data)
-                    await self.process_message(message)
-                    self.message_count += 1
+                for line in messages:
+                    if not self.is_running:
+                        break
+                    line = line.strip()
+                    if not line:
+                        continue
                     
-                except json.JSONDecodeError as e:
-                    logger.error(f"❌ Invalid JSON message: {line[:100]}...")
-                    self.error_count += 1
+                    # Parse message; a bad line is logged and skipped without
+                    # dropping the rest of the batch
+                    try:
+                        message_data = _json_loads(line)
+                        message = CrossLanguageMessage.from_dict(message_data)
+                        await self.process_message(message)
+                        self.message_count += 1
+                        
+                    except json.JSONDecodeError as e:
+                        logger.error(f"❌ Invalid JSON message: {_preview(line)}...")
+                        self.error_count += 1
+                    except Exception as e:
+                        logger.error(f"❌ Error handling message {_preview(line)}...: {e!r}")
+                        self.error_count += 1
                     
             except Exception as e:
                 logger.error(f"❌ Error in message loop: {e}")
                 self.error_count += 1
                 await asyncio.sleep(1)  # Brief pause before continuing
     
-    async def read_stdin_line(self) -> Optional[str]:
-        """Read a line from stdin asynchronously"""
+    async def _open_stdin_reader(self):
+        """Attach a StreamReader to stdin so lines are awaited on the event loop"""
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=STDIN_LINE_LIMIT)
         try:
-            # Use asyncio to read from stdin
-            loop = asyncio.get_event_loop()
-            line = await loop.run_in_executor(None, sys.stdin.readline)
-            return line.strip() if line else None
-        except Exception:
-            return None
+            await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        except (ValueError, OSError, NotImplementedError) as e:
+            # Regular files and Windows consoles can't be attached; read_stdin_line
+            # falls back to the thread-pool executor for those
+            logger.debug("stdin is not pollable (%s); reading it in the executor", e)
+            return
+        self._stdin_reader = reader
+    
+    async def read_stdin_messages(self) -> Optional[List[Any]]:
+        """Read the raw messages stdin has ready, at least one; None once stdin is closed
+        
+        Newline-delimited input is read a chunk at a time and split into lines
+        in one pass, so a burst of buffered messages costs one read.
+        """
+        if FRAMED_PROTOCOL:
+            frame = await self.read_stdin_frame()
+            return None if frame is None else [frame]
+        
+        if self._stdin_reader is None:
+            line = await self.read_stdin_line()
+            return None if line is None else [line]
+        
+        buffer = self._stdin_buffer
+        while True:
+            chunk = await self._stdin_reader.read(STDIN_READ_SIZE)
+            if not chunk:
+                # A last line without a trailing newline is still a message
+                if buffer:
+                    lines = [bytes(buffer)]
+                    buffer.clear()
+                    return lines
+                return None
+            
+            buffer += chunk
+            end = buffer.rfind(b"\n")
+            if end >= 0:
+                lines = buffer[:end].split(b"\n")
+                del buffer[:end + 1]
+                return lines
+            if len(buffer) > STDIN_LINE_LIMIT:
+                buffer.clear()
+                raise ValueError(f"stdin line exceeds {STDIN_LINE_LIMIT} bytes")
+    
+    async def read_stdin_line(self) -> Optional[str]:
+        """Read a line from stdin asynchronously; None once stdin is closed"""
+        if self._stdin_reader is not None:
+            line = await self._stdin_reader.readline()
+            return line.decode().strip() if line else None
+        
+        loop = asyncio.get_running_loop()
+        line = await loop.run_in_executor(None, sys.stdin.readline)
+        return line.strip() if line else None
+    
+    async def read_stdin_frame(self) -> Optional[bytes]:
+        """Read one length-prefixed message body from stdin; None once stdin is closed"""
+        if self._stdin_reader is not None:
+            try:
+                header = await self._stdin_reader.readexactly(4)
+                return await self._stdin_reader.readexactly(int.from_bytes(header, "little"))
+            except asyncio.IncompleteReadError:
+                return None
+        
+        def read_frame() -> Optional[bytes]:
+            stream = sys.stdin.buffer
+            header = stream.read(4)
+            if len(header) < 4:
+                return None
+            size = int.from_bytes(header, "little")
+            body = stream.read(size)
+            return body if len(body) == size else None
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, read_frame)
     
     async def process_message(self, message: CrossLanguageMessage):
         """Process an incoming message"""
         try:
-            logger.debug(f"📥 Processing message: {message.type} ({message.id})")
+            logger.debug("📥 Processing message: %s (%s)", message.type, message.id)
             
             # Update last activity
-            self.last_heartbeat = datetime.now(timezone.utc)
+            self._last_heartbeat_ns = time.monotonic_ns()
             
             # Find and execute handler
             handler = self.message_handlers.get(message.type)
@@ -229,142 +490,192 @@ class BaseAgent(ABC):
     async def send_message(self, message: CrossLanguageMessage):
         """Send a message via stdout"""
         try:
-            message_json = json.dumps(message.to_dict())
-            print(message_json, flush=True)
-            logger.debug(f"📤 Sent message: {message.type} ({message.id})")
+            self._emit(_json_dumpb(message.to_dict()))
+            logger.debug("📤 Sent message: %s (%s)", message.type, message.id)
         except Exception as e:
             logger.error(f"❌ Error sending message: {e}")
             self.error_count += 1
     
+    async def send_dict(self, kind: str, msg_type: str, destination: Dict[str, Any],
+                        payload: Any, metadata: Dict[str, Any]):
+        """Send an agent-generated message straight from its fields
+        
+        Skips building a CrossLanguageMessage for the framework's own replies
+        (pong, status, heartbeat, error); the wire format is the same as
+        send_message's. kind selects the message ID prefix. When send_message
+        has been overridden the message goes through it instead, so overrides
+        still see every outgoing message.
+        """
+        msg_id = self._next_msg_id(kind)
+        if self._send_message_overridden():
+            await self.send_message(CrossLanguageMessage(
+                msg_id=msg_id,
+                msg_type=msg_type,
+                source=self._source,
+                destination=destination,
+                payload=payload,
+                metadata=metadata
+            ))
+            return
+        try:
+            self._emit(_json_dumpb({
+                'id': msg_id,
+                'timestamp': _now_iso(),
+                'type': msg_type,
+                'source': self._source,
+                'destination': destination,
+                'payload': payload,
+                'metadata': metadata
+            }))
+            logger.debug("📤 Sent message: %s (%s)", msg_type, msg_id)
+        except Exception as e:
+            logger.error(f"❌ Error sending message: {e}")
+            self.error_count += 1
+    
+    def _send_message_overridden(self) -> bool:
+        """Whether a subclass or the instance itself replaces send_message"""
+        return getattr(self.send_message, '__func__', None) is not BaseAgent.send_message
+    
+    def _emit(self, data: bytes):
+        """Hand an encoded message to the writer task, or write it directly"""
+        if FRAMED_PROTOCOL:
+            data = len(data).to_bytes(4, "little") + data
+        if self._outbound is not None:
+            self._outbound.put_nowait(data)
+        else:
+            self._write_stdout(data)
+    
+    def _write_stdout(self, data: bytes):
+        """Write encoded messages to stdout and flush"""
+        out = getattr(sys.stdout, 'buffer', None)
+        if out is not None:
+            # Write the encoded bytes straight to the binary stream
+            out.write(data)
+            out.flush()
+        else:
+            sys.stdout.write(data.decode())
+            sys.stdout.flush()
+    
+    async def _writer_loop(self):
+        """Write queued messages, coalescing everything ready into one write"""
+        queue = self._outbound
+        while True:
+            batch = [await queue.get()]
+            while not queue.empty():
+                batch.append(queue.get_nowait())
+            
+            # None asks the writer to finish; later sends go straight to stdout
+            done = None in batch
+            if done:
+                self._outbound = None
+                batch = [data for data in batch if data is not None]
+            
+            if batch:
+                try:
+                    self._write_stdout(b"".join(batch))
+                except Exception as e:
+                    logger.error(f"❌ Error sending message: {e}")
+                    self.error_count += 1
+            if done:
+                return
+    
+    async def _close_writer(self):
+        """Flush any queued messages and stop the writer task"""
+        if self._writer_task is None:
+            return
+        if self._outbound is not None:
+            self._outbound.put_nowait(None)
+        await self._writer_task
+        self._writer_task = None
+    
     async def send_ready_message(self):
         """Send ready message to indicate agent is initialized"""
         message = CrossLanguageMessage(
-            msg_id=f"ready_{int(time.time() * 1000)}",
+            msg_id=self._next_msg_id("ready"),
             msg_type="agent_ready",
-            source={
-                "agentId": self.agent_id,
-                "language": "python",
-                "runtime": "python3"
-            },
-            destination={"broadcast": True},
+            source=self._source,
+            destination=self._broadcast_dest,
             payload={
                 "name": self.name,
                 "version": self.version,
                 "capabilities": await self.get_capabilities()
             },
-            metadata={
-                "priority": "normal",
-                "retryCount": 0,
-                "maxRetries": 0,
-                "timeoutMs": 5000
-            }
+            metadata=_META_NORMAL
         )
         await self.send_message(message)
     
     async def send_goodbye_message(self):
         """Send goodbye message when shutting down"""
         message = CrossLanguageMessage(
-            msg_id=f"goodbye_{int(time.time() * 1000)}",
+            msg_id=self._next_msg_id("goodbye"),
             msg_type="agent_goodbye",
-            source={
-                "agentId": self.agent_id,
-                "language": "python",
-                "runtime": "python3"
-            },
-            destination={"broadcast": True},
+            source=self._source,
+            destination=self._broadcast_dest,
             payload={
                 "reason": "normal_shutdown",
                 "statistics": await self.get_statistics()
             },
-            metadata={
-                "priority": "normal",
-                "retryCount": 0,
-                "maxRetries": 0,
-                "timeoutMs": 5000
-            }
+            metadata=_META_NORMAL
         )
         await self.send_message(message)
     
     async def send_error_message(self, error: str, correlation_id: Optional[str] = None):
         """Send error message"""
-        message = CrossLanguageMessage(
-            msg_id=f"error_{int(time.time() * 1000)}",
-            msg_type="error",
-            source={
-                "agentId": self.agent_id,
-                "language": "python",
-                "runtime": "python3"
-            },
-            destination={"broadcast": True},
-            payload={
+        await self.send_dict(
+            "error", "error", self._broadcast_dest,
+            {
                 "error": error,
-                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "timestamp": _now_iso(),
                 "agent_info": {
                     "name": self.name,
                     "version": self.version
                 }
             },
-            metadata={
-                "priority": "high",
-                "correlationId": correlation_id,
-                "retryCount": 0,
-                "maxRetries": 0,
-                "timeoutMs": 5000
-            }
+            dict(_META_HIGH, correlationId=correlation_id)
         )
-        await self.send_message(message)
     
     async def send_heartbeat(self):
         """Send heartbeat message"""
-        message = CrossLanguageMessage(
-            msg_id=f"heartbeat_{int(time.time() * 1000)}",
-            msg_type="heartbeat",
-            source={
-                "agentId": self.agent_id,
-                "language": "python",
-                "runtime": "python3"
-            },
-            destination={"broadcast": True},
-            payload={
-                "status": "healthy",
-                "uptime": (datetime.now(timezone.utc) - self.started_at).total_seconds(),
-                "message_count": self.message_count,
-                "error_count": self.error_count
-            },
-            metadata={
-                "priority": "low",
-                "retryCount": 0,
-                "maxRetries": 0,
-                "timeoutMs": 1000
-            }
-        )
-        await self.send_message(message)
+        if self._send_message_overridden():
+            await self.send_dict(
+                "heartbeat", "heartbeat", self._broadcast_dest,
+                {
+                    "status": "healthy",
+                    "uptime": self._uptime_seconds(),
+                    "message_count": self.message_count,
+                    "error_count": self.error_count
+                },
+                _META_LOW
+            )
+            return
+        
+        parts = self._heartbeat_parts
+        seq = next(self._id_seq)
+        try:
+            self._emit(b"".join((
+                parts[0], str(seq).encode(),
+                parts[1], _now_iso().encode(),
+                parts[2], repr(self._uptime_seconds()).encode(),
+                parts[3], str(self.message_count).encode(),
+                parts[4], str(self.error_count).encode(),
+                parts[5]
+            )))
+            logger.debug("📤 Sent message: heartbeat (%s%s)", self._id_prefixes["heartbeat"], seq)
+        except Exception as e:
+            logger.error(f"❌ Error sending message: {e}")
+            self.error_count += 1
     
     # Default message handlers
     async def handle_ping(self, message: CrossLanguageMessage):
         """Handle ping message"""
-        response = CrossLanguageMessage(
-            msg_id=f"pong_{int(time.time() * 1000)}",
-            msg_type="pong",
-            source={
-                "agentId": self.agent_id,
-                "language": "python",
-                "runtime": "python3"
-            },
-            destination=message.source,
-            payload={
+        await self.send_dict(
+            "pong", "pong", message.source,
+            {
                 "original_message_id": message.id,
-                "timestamp": datetime.now(timezone.utc).isoformat()
+                "timestamp": _now_iso()
             },
-            metadata={
-                "priority": "normal",
-                "correlationId": message.id,
-                "retryCount": 0,
-                "maxRetries": 0,
-                "timeoutMs": 5000
-            }
+            dict(_META_NORMAL, correlationId=message.id)
         )
-        await self.send_message(response)
     
     async def handle_shutdown(self, message: CrossLanguageMessage):
         """Handle shutdown message"""
@@ -373,25 +684,11 @@ class BaseAgent(ABC):
     
     async def handle_get_status(self, message: CrossLanguageMessage):
         """Handle status request"""
-        response = CrossLanguageMessage(
-            msg_id=f"status_{int(time.time() * 1000)}",
-            msg_type="status_response",
-            source={
-                "agentId": self.agent_id,
-                "language": "python",
-                "runtime": "python3"
-            },
-            destination=message.source,
-            payload=await self.get_status(),
-            metadata={
-                "priority": "normal",
-                "correlationId": message.id,
-                "retryCount": 0,
-                "maxRetries": 0,
-                "timeoutMs": 5000
-            }
+        await self.send_dict(
+            "status", "status_response", message.source,
+            await self.get_status(),
+            dict(_META_NORMAL, correlationId=message.id)
         )
-        await self.send_message(response)
     
     async def handle_heartbeat_request(self, message: CrossLanguageMessage):
         """Handle heartbeat request"""
@@ -403,18 +700,17 @@ class BaseAgent(ABC):
     
     async def get_status(self) -> Dict[str, Any]:
         """Get current agent status"""
-        uptime = (datetime.now(timezone.utc) - self.started_at).total_seconds()
-        return {
-            "agent_id": self.agent_id,
-            "name": self.name,
-            "version": self.version,
-            "status": "running" if self.is_running else "stopped",
-            "uptime_seconds": uptime,
-            "message_count": self.message_count,
-            "error_count": self.error_count,
-            "last_heartbeat": self.last_heartbeat.isoformat(),
-            "started_at": self.started_at.isoformat()
-        }
+        return self._status_dict()
+    
+    def _status_dict(self) -> Dict[str, Any]:
+        """Current status, built from the precomputed template"""
+        status = self._status_template.copy()
+        status["status"] = "running" if self.is_running else "stopped"
+        status["uptime_seconds"] = self._uptime_seconds()
+        status["message_count"] = self.message_count
+        status["error_count"] = self.error_count
+        status["last_heartbeat"] = self.last_heartbeat.isoformat()
+        return status
     
     async def get_statistics(self) -> Dict[str, Any]:
         """Get agent statistics"""
@@ -441,5 +737,11 @@ async def main():
     logger.error("❌ BaseAgent cannot be run directly - create a subclass")
     sys.exit(1)
 
+def run_agent(main: Coroutine[Any, Any, Any]) -> Any:
+    """Run an agent's main coroutine, on uvloop when it is installed"""
+    if UVLOOP_AVAILABLE:
+        return uvloop.run(main)
+    return asyncio.run(main)
+
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    run_agent(main())
\ No newline at end of file
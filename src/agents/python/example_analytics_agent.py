@@ -31,7 +31,7 @@ import math
 
 # Add the base agent directory to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from base_agent import BaseAgent, CrossLanguageMessage, parse_args, logger
+from base_agent import BaseAgent, CrossLanguageMessage, parse_args, logger, run_agent
 
 class AnalyticsAgent(BaseAgent):
     """Python agent for data analytics and reporting"""
@@ -104,7 +104,7 @@ class AnalyticsAgent(BaseAgent):
         for module in modules:
             # Simulate module initialization
             await asyncio.sleep(0.1)
-            logger.debug(f"📈 Initialized analytics module: {module}")
+            logger.debug("📈 Initialized analytics module: %s", module)
     
     async def load_cached_data(self):
         """Load cached analytics data"""
@@ -607,4 +607,4 @@ async def main():
         await agent.stop()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    run_agent(main())
\ No newline at end of file
@@ -25,15 +25,44 @@ import aiohttp
 import json
 import time
 import logging
+import sqlite3
+import threading
 from datetime import datetime, timezone, timedelta
-from typing import Dict, Any, List, Optional, Tuple
-from dataclasses import dataclass, asdict
+from typing import Dict, Any, List, Optional, Tuple, AsyncIterator
+from dataclasses import dataclass
 import re
 
+# orjson is optional; it decodes NOAA's large GeoJSON responses considerably faster
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# ijson is optional; it lets alert consumers start on the first feature
+# before the rest of a large alerts document has arrived
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
-@dataclass
+def _json_dumps(obj: Any) -> str:
+    """Serialize to a JSON string, with orjson when it is installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+def _json_loads(text: str) -> Any:
+    """Parse a JSON string, with orjson when it is installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(text)
+    return json.loads(text)
+
+@dataclass(slots=True, frozen=True)
 class NOAALocation:
     """Represents a NOAA location with grid coordinates"""
     latitude: float
@@ -44,11 +73,14 @@ class NOAALocation:
     forecast_office: str
     city: str
     state: str
+    forecast_zone: Optional[str] = None  # e.g. "IDZ012", used for multi-zone alert queries
     
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        # Fields are all scalars, so a flat read of the slots matches asdict()
+        # without its recursive deep copy
+        return {name: getattr(self, name) for name in self.__slots__}
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class NOAAWeatherReading:
     """Represents a weather reading from NOAA"""
     timestamp: str
@@ -63,9 +95,9 @@ class NOAAWeatherReading:
     source: str = "NOAA"
     
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        return {name: getattr(self, name) for name in self.__slots__}
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class NOAAAlert:
     """Represents a NOAA weather alert"""
     alert_id: str
@@ -84,19 +116,37 @@ class NOAAAlert:
     message_type: str
     
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        alert_dict = {name: getattr(self, name) for name in self.__slots__}
+        alert_dict['areas'] = list(self.areas)
+        return alert_dict
 
 class NOAAWeatherService:
     """Service for integrating with NOAA/NWS weather API"""
     
-    def __init__(self, user_agent: str = "CommunityServices/1.0 (weather-monitoring@community.org)"):
+    def __init__(self, user_agent: str = "CommunityServices/1.0 (weather-monitoring@community.org)",
+                 connector: Optional[aiohttp.BaseConnector] = None,
+                 cache_path: Optional[str] = None, cache_ttl: float = 3600.0,
+                 concurrency: int = 5):
         self.base_url = "https://api.weather.gov"
         self.user_agent = user_agent
         self.session: Optional[aiohttp.ClientSession] = None
+        # Optional connector shared with other services; the caller owns and closes it
+        self.connector = connector
         self.location_cache: Dict[str, NOAALocation] = {}
         self.rate_limit_delay = 1.0  # Seconds between requests
         self.last_request_time = 0.0
         self.timeout = aiohttp.ClientTimeout(total=30)
+        # Caps in-flight requests when callers fan out across locations, keeping
+        # us under NOAA's soft limit instead of provoking 429 retries
+        self.concurrency = concurrency
+        self._request_slots = asyncio.Semaphore(concurrency)
+        # Optional on-disk cache for the slow-changing /points lookups; current
+        # conditions, forecasts and alerts are always fetched fresh. The
+        # database is used from worker threads so it never blocks the loop.
+        self.cache_path = cache_path
+        self.cache_ttl = cache_ttl  # Seconds a cached response stays fresh
+        self._cache_db: Optional[sqlite3.Connection] = None
+        self._cache_lock = threading.Lock()
         
         logger.info(f"🌐 NOAA Weather Service initialized with User-Agent: {user_agent}")
     
@@ -119,7 +169,10 @@ class NOAAWeatherService:
             self.session = aiohttp.ClientSession(
                 headers=headers,
                 timeout=self.timeout,
-                connector=aiohttp.TCPConnector(limit=10)
+                json_serialize=_json_dumps,
+                connector=self.connector or aiohttp.TCPConnector(limit=self.concurrency,
+                                                                  limit_per_host=self.concurrency),
+                connector_owner=self.connector is None
             )
             logger.info("📡 NOAA API session initialized")
     
@@ -129,10 +182,62 @@ class NOAAWeatherService:
             await self.session.close()
             self.session = None
             logger.info("🔒 NOAA API session closed")
+        
+        with self._cache_lock:
+            if self._cache_db:
+                self._cache_db.close()
+                self._cache_db = None
     
-    async def _make_request(self, url: str) -> Optional[Dict[str, Any]]:
-        """Make a rate-limited request to the NOAA API"""
-        # Implement rate limiting
+    def _is_cacheable(self, url: str) -> bool:
+        """Only point lookups are stable enough to serve from the disk cache"""
+        return bool(self.cache_path) and url.startswith(f"{self.base_url}/points/")
+    
+    def _get_cache_db(self) -> sqlite3.Connection:
+        """Open the response cache database on first use; call with _cache_lock held"""
+        if self._cache_db is None:
+            self._cache_db = sqlite3.connect(self.cache_path, check_same_thread=False)
+            self._cache_db.execute(
+                "CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, fetched_at REAL, body TEXT)"
+            )
+        return self._cache_db
+    
+    def _cache_get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return a fresh cached response for a URL, if there is one (blocking)"""
+        with self._cache_lock:
+            row = self._get_cache_db().execute(
+                "SELECT body FROM responses WHERE url = ? AND fetched_at > ?",
+                (url, time.time() - self.cache_ttl)
+            ).fetchone()
+        return _json_loads(row[0]) if row else None
+    
+    def _cache_put(self, url: str, data: Dict[str, Any]):
+        """Store a successful response in the disk cache (blocking)"""
+        body = _json_dumps(data)
+        with self._cache_lock:
+            db = self._get_cache_db()
+            db.execute(
+                "INSERT OR REPLACE INTO responses (url, fetched_at, body) VALUES (?, ?, ?)",
+                (url, time.time(), body)
+            )
+            db.commit()
+    
+    async def _cache_lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """Read the disk cache off the event loop; a broken cache reads as a miss"""
+        try:
+            return await asyncio.to_thread(self._cache_get, url)
+        except Exception as e:
+            logger.warning(f"⚠️ NOAA response cache read failed, fetching instead: {e}")
+            return None
+    
+    async def _cache_store(self, url: str, data: Dict[str, Any]):
+        """Write the disk cache off the event loop; failures are logged and ignored"""
+        try:
+            await asyncio.to_thread(self._cache_put, url, data)
+        except Exception as e:
+            logger.warning(f"⚠️ NOAA response cache write failed: {e}")
+    
+    async def _throttle(self):
+        """Space requests out by the configured rate limit delay"""
         current_time = time.time()
         time_since_last = current_time - self.last_request_time
         if time_since_last < self.rate_limit_delay:
@@ -140,27 +245,49 @@ class NOAAWeatherService:
             await asyncio.sleep(wait_time)
         
         self.last_request_time = time.time()
+    
+    async def _make_request(self, url: str) -> Optional[Dict[str, Any]]:
+        """Make a rate-limited request to the NOAA API"""
+        cacheable = self._is_cacheable(url)
+        if cacheable:
+            cached = await self._cache_lookup(url)
+            if cached is not None:
+                logger.debug("💾 Using cached NOAA response: %s", url)
+                return cached
+        
+        await self._throttle()
         
         try:
             if not self.session:
                 await self.initialize()
             
-            logger.debug(f"🌐 Making NOAA API request: {url}")
-            async with self.session.get(url) as response:
+            logger.debug("🌐 Making NOAA API request: %s", url)
+            data = None
+            async with self._request_slots, self.session.get(url) as response:
                 if response.status == 200:
-                    data = await response.json()
-                    logger.debug(f"✅ NOAA API request successful: {response.status}")
-                    return data
+                    if ORJSON_AVAILABLE:
+                        data = orjson.loads(await response.read())
+                    else:
+                        data = await response.json()
+                    logger.debug("✅ NOAA API request successful: %s", response.status)
                 elif response.status == 404:
                     logger.warning(f"⚠️ NOAA API resource not found: {url}")
                     return None
-                elif response.status == 429:
-                    logger.warning("⚠️ NOAA API rate limit exceeded, waiting...")
-                    await asyncio.sleep(5)
-                    return await self._make_request(url)  # Retry once
-                else:
+                elif response.status != 429:
                     logger.error(f"❌ NOAA API request failed: {response.status} - {await response.text()}")
                     return None
+            
+            # Store the response once the request slot is released, so disk
+            # I/O never holds up another request
+            if data is not None:
+                if cacheable:
+                    await self._cache_store(url, data)
+                return data
+            
+            # Rate limited; back off with the request slot released, then retry
+            logger.warning("⚠️ NOAA API rate limit exceeded, waiting...")
+            await asyncio.sleep(5)
+            return await self._make_request(url)
                     
         except asyncio.TimeoutError:
             logger.error(f"⏰ NOAA API request timeout: {url}")
@@ -180,7 +307,7 @@ class NOAAWeatherService:
         
         cache_key = f"{lat},{lon}"
         if cache_key in self.location_cache:
-            logger.debug(f"📍 Using cached location info for {cache_key}")
+            logger.debug("📍 Using cached location info for %s", cache_key)
             return self.location_cache[cache_key]
         
         url = f"{self.base_url}/points/{lat},{lon}"
@@ -200,7 +327,8 @@ class NOAAWeatherService:
                 grid_y=props['gridY'],
                 forecast_office=props['cwa'],
                 city=props.get('relativeLocation', {}).get('properties', {}).get('city', 'Unknown'),
-                state=props.get('relativeLocation', {}).get('properties', {}).get('state', 'Unknown')
+                state=props.get('relativeLocation', {}).get('properties', {}).get('state', 'Unknown'),
+                forecast_zone=props['forecastZone'].rsplit('/', 1)[-1] if props.get('forecastZone') else None
             )
             
             self.location_cache[cache_key] = location
@@ -355,18 +483,20 @@ class NOAAWeatherService:
         logger.info(f"📅 Retrieved {len(forecast_readings)} hourly forecast periods from NOAA")
         return forecast_readings
     
-    async def get_active_alerts(self, latitude: float, longitude: float, area_filter: Optional[str] = None) -> List[NOAAAlert]:
-        """Get active weather alerts for a location or area"""
-        # Build URL for alerts
+    def _alerts_url(self, latitude: float, longitude: float, area_filter: Optional[str] = None) -> str:
+        """Build the active alerts URL for a point, or for a state or zone filter"""
         if area_filter:
             # Filter by state or zone
-            url = f"{self.base_url}/alerts/active?area={area_filter}"
-        else:
-            # Filter by point (lat,lon)
-            lat = round(latitude, 4)
-            lon = round(longitude, 4)
-            url = f"{self.base_url}/alerts/active?point={lat},{lon}"
+            return f"{self.base_url}/alerts/active?area={area_filter}"
         
+        # Filter by point (lat,lon)
+        lat = round(latitude, 4)
+        lon = round(longitude, 4)
+        return f"{self.base_url}/alerts/active?point={lat},{lon}"
+    
+    async def get_active_alerts(self, latitude: float, longitude: float, area_filter: Optional[str] = None) -> List[NOAAAlert]:
+        """Get active weather alerts for a location or area"""
+        url = self._alerts_url(latitude, longitude, area_filter)
         data = await self._make_request(url)
         
         if not data or 'features' not in data:
@@ -376,27 +506,7 @@ class NOAAWeatherService:
         alerts = []
         for feature in data['features']:
             try:
-                props = feature.get('properties', {})
-                
-                alert = NOAAAlert(
-                    alert_id=props.get('id', f"alert_{int(time.time())}"),
-                    event=props.get('event', 'Unknown Event'),
-                    severity=props.get('severity', 'Unknown'),
-                    certainty=props.get('certainty', 'Unknown'),
-                    urgency=props.get('urgency', 'Unknown'),
-                    headline=props.get('headline', ''),
-                    description=props.get('description', ''),
-                    instruction=props.get('instruction'),
-                    areas=props.get('areaDesc', '').split('; ') if props.get('areaDesc') else [],
-                    effective=props.get('effective', ''),
-                    expires=props.get('expires', ''),
-                    sender=props.get('senderName', 'NWS'),
-                    status=props.get('status', 'Unknown'),
-                    message_type=props.get('messageType', 'Alert')
-                )
-                
-                alerts.append(alert)
-                
+                alerts.append(self._parse_alert(feature.get('properties', {})))
             except Exception as e:
                 logger.warning(f"⚠️ Error parsing alert: {e}")
                 continue
@@ -404,6 +514,97 @@ class NOAAWeatherService:
         logger.info(f"🚨 Retrieved {len(alerts)} active alerts from NOAA")
         return alerts
     
+    async def iter_active_alerts(self, latitude: float, longitude: float,
+                                 area_filter: Optional[str] = None) -> AsyncIterator[NOAAAlert]:
+        """Yield active alerts one at a time, parsing the response as it streams in
+        
+        With ijson, the generator holds one of the request slots and an open
+        connection until the caller finishes iterating or calls aclose(), so
+        consume it promptly rather than awaiting other requests between alerts.
+        """
+        if not IJSON_AVAILABLE:
+            for alert in await self.get_active_alerts(latitude, longitude, area_filter):
+                yield alert
+            return
+        
+        url = self._alerts_url(latitude, longitude, area_filter)
+        await self._throttle()
+        
+        try:
+            if not self.session:
+                await self.initialize()
+            
+            logger.debug("🌐 Streaming NOAA API request: %s", url)
+            async with self._request_slots, self.session.get(url) as response:
+                if response.status != 200:
+                    logger.warning(f"⚠️ NOAA alert stream failed: {response.status} - {url}")
+                    return
+                
+                async for feature in ijson.items_async(response.content, 'features.item'):
+                    try:
+                        yield self._parse_alert(feature.get('properties', {}))
+                    except Exception as e:
+                        logger.warning(f"⚠️ Error parsing alert: {e}")
+                        
+        except asyncio.TimeoutError:
+            logger.error(f"⏰ NOAA API request timeout: {url}")
+        except aiohttp.ClientError as e:
+            logger.error(f"❌ NOAA API client error: {e}")
+    
+    async def get_alerts_bulk(self, locations: List[NOAALocation]) -> Dict[NOAALocation, List[NOAAAlert]]:
+        """Get active alerts for several locations with a single multi-zone request"""
+        alerts_by_location: Dict[NOAALocation, List[NOAAAlert]] = {location: [] for location in locations}
+        
+        zoned = [location for location in alerts_by_location if location.forecast_zone]
+        if zoned:
+            zones = sorted({location.forecast_zone for location in zoned})
+            url = f"{self.base_url}/alerts/active?zone={','.join(zones)}"
+            data = await self._make_request(url)
+            
+            if not data or 'features' not in data:
+                logger.warning(f"⚠️ No alert data received for zones {','.join(zones)}")
+            else:
+                for feature in data['features']:
+                    try:
+                        props = feature.get('properties', {})
+                        alert = self._parse_alert(props)
+                    except Exception as e:
+                        logger.warning(f"⚠️ Error parsing alert: {e}")
+                        continue
+                    
+                    # Hand each alert to every requested location whose zone it covers
+                    affected_zones = set(props.get('geocode', {}).get('UGC', []))
+                    for location in zoned:
+                        if location.forecast_zone in affected_zones:
+                            alerts_by_location[location].append(alert)
+        
+        # Locations without a known zone fall back to point queries
+        for location in alerts_by_location:
+            if not location.forecast_zone:
+                alerts_by_location[location] = await self.get_active_alerts(location.latitude, location.longitude)
+        
+        logger.info(f"🚨 Retrieved active alerts for {len(alerts_by_location)} locations from NOAA")
+        return alerts_by_location
+    
+    def _parse_alert(self, props: Dict[str, Any]) -> NOAAAlert:
+        """Build a NOAAAlert from the properties of an alert feature"""
+        return NOAAAlert(
+            alert_id=props.get('id', f"alert_{int(time.time())}"),
+            event=props.get('event', 'Unknown Event'),
+            severity=props.get('severity', 'Unknown'),
+            certainty=props.get('certainty', 'Unknown'),
+            urgency=props.get('urgency', 'Unknown'),
+            headline=props.get('headline', ''),
+            description=props.get('description', ''),
+            instruction=props.get('instruction'),
+            areas=props.get('areaDesc', '').split('; ') if props.get('areaDesc') else [],
+            effective=props.get('effective', ''),
+            expires=props.get('expires', ''),
+            sender=props.get('senderName', 'NWS'),
+            status=props.get('status', 'Unknown'),
+            message_type=props.get('messageType', 'Alert')
+        )
+    
     async def get_alerts_by_state(self, state_code: str) -> List[NOAAAlert]:
         """Get all active alerts for a state (e.g., 'ID' for Idaho)"""
         return await self.get_active_alerts(0, 0, area_filter=state_code)
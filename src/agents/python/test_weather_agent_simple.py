@@ -14,6 +14,8 @@ This script tests:
 Usage: python3 test_weather_agent_simple.py
 """
 
+import io
+import os
 import sys
 import asyncio
 import json
@@ -26,50 +28,57 @@ from weather_monitoring_agent import (
 )
 from base_agent import CrossLanguageMessage
 
+# uvloop is optional; it only speeds up the event loop the suites run on
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
+# Report line prefixes, built once
+_FAIL = "❌ FAIL: "
+
 class SimpleTestRunner:
-    def __init__(self):
-        self.tests_run = 0
-        self.tests_passed = 0
-        self.tests_failed = 0
+    def __init__(self, title=""):
+        # Printed as the heading of the suite's report, so concurrent suites
+        # never interleave their output
+        self.title = title
+        # One (passed, message) entry per assertion; the counts are derived
+        # once in print_summary()
+        self.results = []
     
     def assert_true(self, condition, message="Assertion failed"):
-        self.tests_run += 1
-        if condition:
-            self.tests_passed += 1
-            print(f"✅ PASS: {message}")
-        else:
-            self.tests_failed += 1
-            print(f"❌ FAIL: {message}")
+        self.results.append((bool(condition), message))
     
     def assert_equal(self, actual, expected, message="Values not equal"):
-        self.tests_run += 1
         if actual == expected:
-            self.tests_passed += 1
-            print(f"✅ PASS: {message}")
+            self.results.append((True, message))
         else:
-            self.tests_failed += 1
-            print(f"❌ FAIL: {message} (expected: {expected}, actual: {actual})")
+            self.results.append((False, f"{message} (expected: {expected}, actual: {actual})"))
     
     def assert_not_none(self, value, message="Value is None"):
-        self.tests_run += 1
-        if value is not None:
-            self.tests_passed += 1
-            print(f"✅ PASS: {message}")
-        else:
-            self.tests_failed += 1
-            print(f"❌ FAIL: {message}")
+        self.results.append((value is not None, message))
     
     def print_summary(self):
-        print(f"\n📊 Test Results:")
-        print(f"   Tests run: {self.tests_run}")
-        print(f"   Passed: {self.tests_passed}")
-        print(f"   Failed: {self.tests_failed}")
-        if self.tests_failed == 0:
-            print("🎉 All tests passed!")
-            return True
-        else:
-            print("💥 Some tests failed!")
-            return False
+        tests_run = len(self.results)
+        tests_passed = sum(passed for passed, _ in self.results)
+        tests_failed = tests_run - tests_passed
+        
+        # Collect the whole report and write it in one go; passing
+        # assertions only show up in the counts
+        buf = io.StringIO()
+        buf.write(f"\n{self.title}\n")
+        for passed, message in self.results:
+            if not passed:
+                buf.write(f"{_FAIL}{message}\n")
+        buf.write(f"\n📊 Test Results:\n")
+        buf.write(f"   Tests run: {tests_run}\n")
+        buf.write(f"   Passed: {tests_passed}\n")
+        buf.write(f"   Failed: {tests_failed}\n")
+        buf.write("🎉 All tests passed!\n" if tests_failed == 0 else "💥 Some tests failed!\n")
+        sys.stdout.write(buf.getvalue())
+        sys.stdout.flush()
+        return tests_failed == 0
 
 class MockSendMessage:
     """Mock for the send_message method to avoid actual message sending"""
@@ -81,8 +90,7 @@ class MockSendMessage:
 
 async def test_weather_simulator():
     """Test weather simulation functionality"""
-    print("\n🌤️ Testing Weather Simulator...")
-    test = SimpleTestRunner()
+    test = SimpleTestRunner("🌤️ Testing Weather Simulator...")
     
     # Test simulator initialization
     simulator = WeatherSimulator(base_temp=70.0, location="Test City")
@@ -115,8 +123,7 @@ async def test_weather_simulator():
 
 async def test_weather_agent_initialization():
     """Test weather agent initialization"""
-    print("\n🤖 Testing Weather Agent Initialization...")
-    test = SimpleTestRunner()
+    test = SimpleTestRunner("🤖 Testing Weather Agent Initialization...")
     
     # Test agent creation
     agent = WeatherMonitoringAgent("test_agent", "Test Location")
@@ -146,8 +153,7 @@ async def test_weather_agent_initialization():
 
 async def test_weather_analysis():
     """Test weather analysis functionality"""
-    print("\n📊 Testing Weather Analysis...")
-    test = SimpleTestRunner()
+    test = SimpleTestRunner("📊 Testing Weather Analysis...")
     
     agent = WeatherMonitoringAgent("analysis_test_agent", "Analysis City")
     
@@ -199,8 +205,7 @@ async def test_weather_analysis():
 
 async def test_alert_generation():
     """Test weather alert generation"""
-    print("\n⚠️ Testing Alert Generation...")
-    test = SimpleTestRunner()
+    test = SimpleTestRunner("⚠️ Testing Alert Generation...")
     
     agent = WeatherMonitoringAgent("alert_test_agent", "Alert City")
     
@@ -248,8 +253,7 @@ async def test_alert_generation():
 
 async def test_message_handling():
     """Test message handling functionality"""
-    print("\n💬 Testing Message Handling...")
-    test = SimpleTestRunner()
+    test = SimpleTestRunner("💬 Testing Message Handling...")
     
     agent = WeatherMonitoringAgent("message_test_agent", "Message City")
     await agent.initialize()
@@ -300,14 +304,16 @@ async def main():
     """Run all tests"""
     print("🧪 Starting Weather Agent Simple Tests\n")
     
-    all_passed = True
-    
-    # Run all test suites
-    all_passed &= await test_weather_simulator()
-    all_passed &= await test_weather_agent_initialization()
-    all_passed &= await test_weather_analysis()
-    all_passed &= await test_alert_generation()
-    all_passed &= await test_message_handling()
+    # Run all test suites concurrently; each one builds its own agent/simulator
+    suites = [
+        test_weather_simulator,
+        test_weather_agent_initialization,
+        test_weather_analysis,
+        test_alert_generation,
+        test_message_handling
+    ]
+    results = await asyncio.gather(*(suite() for suite in suites))
+    all_passed = all(results)
     
     print("\n" + "="*50)
     if all_passed:
@@ -318,5 +324,12 @@ async def main():
         return 1
 
 if __name__ == "__main__":
-    exit_code = asyncio.run(main())
+    run = uvloop.run if UVLOOP_AVAILABLE else asyncio.run
+    exit_code = run(main())
+    if os.environ.get("CI"):
+        # CI only needs the exit status, so skip interpreter shutdown; os._exit
+        # does not flush stdio, so do that first
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(exit_code)
     sys.exit(exit_code)
\ No newline at end of file
@@ -17,15 +17,18 @@ Features:
 """
 
 import asyncio
+import bisect
 import json
 import sys
 import time
 import random
 import logging
+from collections import Counter, OrderedDict
+from functools import cached_property, lru_cache
 from datetime import datetime, timezone, timedelta
 from typing import Dict, Any, List, Optional, Union
 from dataclasses import dataclass, asdict
-from base_agent import BaseAgent, CrossLanguageMessage
+from base_agent import BaseAgent, CrossLanguageMessage, run_agent
 # Configure logging first
 logging.basicConfig(
     level=logging.INFO,
@@ -52,7 +55,7 @@ except ImportError as e:
     NOAAAlert = None
     geocode_city_state = None
 
-@dataclass
+@dataclass(slots=True)
 class WeatherReading:
     """Represents a single weather reading"""
     timestamp: str
@@ -87,6 +90,31 @@ class WeatherAlert:
     def to_dict(self) -> Dict[str, Any]:
         return asdict(self)
 
+@lru_cache(maxsize=4096)
+def _timestamp_epoch(timestamp: str) -> float:
+    """Seconds since the epoch for an ISO 8601 timestamp, parsed once per distinct string"""
+    return datetime.fromisoformat(timestamp.replace('Z', '+00:00')).timestamp()
+
+def _reading_epoch(reading: 'WeatherReading') -> float:
+    """Sort key for the chronological reading history"""
+    return _timestamp_epoch(reading.timestamp)
+
+def _copy_analysis(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of an analysis result; its values are scalars or nested dicts, so
+    copying the dicts is enough and much cheaper than copy.deepcopy"""
+    return {key: _copy_analysis(value) if isinstance(value, dict) else value
+            for key, value in analysis.items()}
+
+# Temperature change (°F) across an analysis window below which the trend is "stable"
+TREND_THRESHOLD_F = 0.5
+
+# Number of get_weather_analysis results each agent keeps
+ANALYSIS_CACHE_SIZE = 16
+
+# 16-point compass directions used for simulated wind
+WIND_DIRECTIONS = ('N', 'NNE', 'NE', 'ENE', 'E', 'ESE', 'SE', 'SSE',
+                   'S', 'SSW', 'SW', 'WSW', 'W', 'WNW', 'NW', 'NNW')
+
 class WeatherSimulator:
     """Simulates realistic weather patterns for testing"""
     
@@ -129,9 +157,7 @@ class WeatherSimulator:
         wind_speed = max(0, base_wind + random.normalvariate(0, 3))
         
         # Wind direction
-        directions = ['N', 'NNE', 'NE', 'ENE', 'E', 'ESE', 'SE', 'SSE', 
-                     'S', 'SSW', 'SW', 'WSW', 'W', 'WNW', 'NW', 'NNW']
-        wind_direction = random.choice(directions)
+        wind_direction = random.choice(WIND_DIRECTIONS)
         
         # Atmospheric pressure
         base_pressure = 1013.25 + self.current_conditions['pressure_trend']
@@ -182,6 +208,11 @@ class WeatherSimulator:
             uv_index=uv_index
         )
     
+    def generate_batch(self, n: int, start_offset: int = 0) -> List[WeatherReading]:
+        """Generate n consecutive hourly readings starting at start_offset"""
+        generate = self.generate_hourly_reading
+        return [generate(hour_offset) for hour_offset in range(start_offset, start_offset + n)]
+    
     def _update_trends(self):
         """Update weather trends for more realistic simulation"""
         # Temperature trend changes
@@ -204,8 +235,11 @@ class WeatherMonitoringAgent(BaseAgent):
         super().__init__(agent_id, "Weather Monitoring Agent", "1.0.0")
         self.location = location
         self.use_real_weather = use_real_weather
-        self.simulator = WeatherSimulator(location=location)
-        self.weather_data: List[WeatherReading] = []
+        
+        # Recent get_weather_analysis results keyed on (hours_back, data fingerprint)
+        self._analysis_cache: OrderedDict = OrderedDict()
+        
+        self.weather_data: List[WeatherReading] = []  # Oldest first
         self.active_alerts: List[WeatherAlert] = []
         self.noaa_alerts: List[NOAAAlert] = []
         self.monitoring_active = False
@@ -230,6 +264,11 @@ class WeatherMonitoringAgent(BaseAgent):
         
         logger.info(f"🌤️ Weather Monitoring Agent initialized for {self.location} (Real weather: {self.use_real_weather})")
     
+    @cached_property
+    def simulator(self) -> WeatherSimulator:
+        """Weather simulator for this location, built on first use"""
+        return WeatherSimulator(location=self.location)
+    
     def register_weather_handlers(self):
         """Register weather-specific message handlers"""
         self.register_handler('start_monitoring', self.handle_start_monitoring)
@@ -277,6 +316,11 @@ class WeatherMonitoringAgent(BaseAgent):
             logger.warning("⚠️ NOAA service not available (missing aiohttp), falling back to simulation")
             self.use_real_weather = False
         
+        # After a fallback the NOAA service is never used; release its HTTP session
+        if not self.use_real_weather and self.noaa_service:
+            await self.noaa_service.close()
+            self.noaa_service = None
+        
         # Get initial weather reading
         if self.use_real_weather and self.noaa_service and self.noaa_location:
             try:
@@ -284,7 +328,7 @@ class WeatherMonitoringAgent(BaseAgent):
                 if noaa_reading:
                     # Convert NOAA reading to our internal format
                     initial_reading = self._convert_noaa_reading(noaa_reading)
-                    self.weather_data.append(initial_reading)
+                    self._record_reading(initial_reading)
                     logger.info(f"📊 Initial NOAA weather reading: {initial_reading.conditions}, {initial_reading.temperature_f}°F")
                 else:
                     raise Exception("Failed to get NOAA weather reading")
@@ -292,12 +336,12 @@ class WeatherMonitoringAgent(BaseAgent):
                 logger.warning(f"⚠️ Failed to get initial NOAA reading: {e}")
                 # Fall back to simulation for this reading
                 initial_reading = self.simulator.generate_hourly_reading()
-                self.weather_data.append(initial_reading)
+                self._record_reading(initial_reading)
                 logger.info(f"📊 Initial simulated weather reading: {initial_reading.conditions}, {initial_reading.temperature_f}°F")
         else:
             # Use simulated data
             initial_reading = self.simulator.generate_hourly_reading()
-            self.weather_data.append(initial_reading)
+            self._record_reading(initial_reading)
             logger.info(f"📊 Initial simulated weather reading: {initial_reading.conditions}, {initial_reading.temperature_f}°F")
         
         # Get initial NOAA alerts if available
@@ -349,6 +393,7 @@ class WeatherMonitoringAgent(BaseAgent):
             return False
         
         self.monitoring_active = True
+        self._analysis_cache.clear()
         self.monitoring_task = asyncio.create_task(
             self._monitoring_loop(duration_hours)
         )
@@ -397,7 +442,7 @@ class WeatherMonitoringAgent(BaseAgent):
                     # Use simulated data
                     reading = self.simulator.generate_hourly_reading()
                 
-                self.weather_data.append(reading)
+                self._record_reading(reading)
                 
                 # Keep only last 7 days of data
                 if len(self.weather_data) > 168:  # 7 days * 24 hours
@@ -429,54 +474,61 @@ class WeatherMonitoringAgent(BaseAgent):
     
     async def _check_weather_alerts(self, reading: WeatherReading):
         """Check weather reading against alert thresholds"""
+        await self._check_weather_alerts_batch([reading])
+    
+    async def _check_weather_alerts_batch(self, readings: List[WeatherReading]):
+        """Check several readings against alert thresholds, expiring old alerts once"""
+        thresholds = self.alert_thresholds
+        alerts_generated = [
+            alert
+            for reading in readings
+            for alert in self._alerts_for_reading(reading, thresholds)
+        ]
+        
+        # Add new alerts and broadcast them
+        for alert in alerts_generated:
+            self.active_alerts.append(alert)
+            await self._broadcast_weather_alert(alert)
+            logger.warning(f"⚠️ Weather Alert: {alert.message}")
+        
+        # Clean up old alerts (remove alerts older than 6 hours)
+        cutoff_time = time.time() - 6 * 3600
+        self.active_alerts = [
+            alert for alert in self.active_alerts 
+            if _timestamp_epoch(alert.timestamp) > cutoff_time
+        ]
+    
+    def _alerts_for_reading(self, reading: WeatherReading, thresholds: Dict[str, float]) -> List[WeatherAlert]:
+        """Alerts a single reading triggers under the given thresholds"""
         alerts_generated = []
         
         # Temperature alerts
-        if reading.temperature_f >= self.alert_thresholds['temperature_high']:
-            alert = self._create_temperature_alert(reading, 'high')
-            alerts_generated.append(alert)
-        elif reading.temperature_f <= self.alert_thresholds['temperature_low']:
-            alert = self._create_temperature_alert(reading, 'low')
-            alerts_generated.append(alert)
+        if reading.temperature_f >= thresholds['temperature_high']:
+            alerts_generated.append(self._create_temperature_alert(reading, 'high'))
+        elif reading.temperature_f <= thresholds['temperature_low']:
+            alerts_generated.append(self._create_temperature_alert(reading, 'low'))
         
         # Precipitation alerts
-        if reading.precipitation_inches >= self.alert_thresholds['precipitation_extreme']:
-            alert = self._create_precipitation_alert(reading, 'extreme')
-            alerts_generated.append(alert)
-        elif reading.precipitation_inches >= self.alert_thresholds['precipitation_heavy']:
-            alert = self._create_precipitation_alert(reading, 'heavy')
-            alerts_generated.append(alert)
+        if reading.precipitation_inches >= thresholds['precipitation_extreme']:
+            alerts_generated.append(self._create_precipitation_alert(reading, 'extreme'))
+        elif reading.precipitation_inches >= thresholds['precipitation_heavy']:
+            alerts_generated.append(self._create_precipitation_alert(reading, 'heavy'))
         
         # Wind alerts
-        if reading.wind_speed_mph >= self.alert_thresholds['wind_extreme']:
-            alert = self._create_wind_alert(reading, 'extreme')
-            alerts_generated.append(alert)
-        elif reading.wind_speed_mph >= self.alert_thresholds['wind_high']:
-            alert = self._create_wind_alert(reading, 'high')
-            alerts_generated.append(alert)
+        if reading.wind_speed_mph >= thresholds['wind_extreme']:
+            alerts_generated.append(self._create_wind_alert(reading, 'extreme'))
+        elif reading.wind_speed_mph >= thresholds['wind_high']:
+            alerts_generated.append(self._create_wind_alert(reading, 'high'))
         
         # Visibility alerts
-        if reading.visibility_miles <= self.alert_thresholds['visibility_low']:
-            alert = self._create_visibility_alert(reading)
-            alerts_generated.append(alert)
+        if reading.visibility_miles <= thresholds['visibility_low']:
+            alerts_generated.append(self._create_visibility_alert(reading))
         
         # UV alerts
-        if reading.uv_index >= self.alert_thresholds['uv_extreme']:
-            alert = self._create_uv_alert(reading)
-            alerts_generated.append(alert)
-        
-        # Add new alerts and broadcast them
-        for alert in alerts_generated:
-            self.active_alerts.append(alert)
-            await self._broadcast_weather_alert(alert)
-            logger.warning(f"⚠️ Weather Alert: {alert.message}")
+        if reading.uv_index >= thresholds['uv_extreme']:
+            alerts_generated.append(self._create_uv_alert(reading))
         
-        # Clean up old alerts (remove alerts older than 6 hours)
-        cutoff_time = datetime.now(timezone.utc) - timedelta(hours=6)
-        self.active_alerts = [
-            alert for alert in self.active_alerts 
-            if datetime.fromisoformat(alert.timestamp.replace('Z', '+00:00')) > cutoff_time
-        ]
+        return alerts_generated
     
     def _create_temperature_alert(self, reading: WeatherReading, temp_type: str) -> WeatherAlert:
         """Create temperature-related alert"""
@@ -658,48 +710,67 @@ class WeatherMonitoringAgent(BaseAgent):
         if not self.weather_data:
             return {"error": "No weather data available"}
         
+        # The same window over unchanged data gives the same result; the minute
+        # bucket keeps the window moving forward as time passes. Assigning
+        # weather_data clears the cache; code that edits readings in place
+        # must clear _analysis_cache itself.
+        key = (hours_back, len(self.weather_data), self.weather_data[-1].timestamp,
+               len(self.active_alerts), int(time.time() // 60))
+        analysis = self._analysis_cache.get(key)
+        if analysis is None:
+            analysis = self._compute_analysis(hours_back)
+            self._analysis_cache[key] = analysis
+            if len(self._analysis_cache) > ANALYSIS_CACHE_SIZE:
+                self._analysis_cache.popitem(last=False)
+        else:
+            self._analysis_cache.move_to_end(key)
+        # Callers get their own copy, so editing a response never changes the cache
+        return _copy_analysis(analysis)
+    
+    def _compute_analysis(self, hours_back: int) -> Dict[str, Any]:
+        """Compute the weather analysis for the last hours_back hours"""
         # Get data from specified time period
-        cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours_back)
-        recent_data = [
-            reading for reading in self.weather_data
-            if datetime.fromisoformat(reading.timestamp.replace('Z', '+00:00')) > cutoff_time
-        ]
+        recent_data = self._readings_since(hours_back)
         
         if not recent_data:
             return {"error": f"No data available for last {hours_back} hours"}
         
-        # Calculate statistics
-        temps = [r.temperature_f for r in recent_data]
-        humidity = [r.humidity_percent for r in recent_data]
-        precipitation = [r.precipitation_inches for r in recent_data]
-        wind_speeds = [r.wind_speed_mph for r in recent_data]
+        # Calculate statistics; pull the numeric columns out in a single pass so
+        # the reductions below run over plain tuples of floats
+        temps, humidity, precipitation, wind_speeds = zip(*(
+            (r.temperature_f, r.humidity_percent, r.precipitation_inches, r.wind_speed_mph)
+            for r in recent_data
+        ))
+        count = len(recent_data)
+        temp_change = temps[-1] - temps[0]
         
         analysis = {
             "period": f"Last {hours_back} hours",
-            "data_points": len(recent_data),
+            "data_points": count,
             "temperature": {
                 "current": recent_data[-1].temperature_f,
                 "min": min(temps),
                 "max": max(temps),
-                "avg": round(sum(temps) / len(temps), 1),
-                "trend": "rising" if temps[-1] > temps[0] else "falling" if temps[-1] < temps[0] else "stable"
+                "avg": round(sum(temps) / count, 1),
+                "trend": ("rising" if temp_change > TREND_THRESHOLD_F
+                          else "falling" if temp_change < -TREND_THRESHOLD_F else "stable")
             },
             "humidity": {
                 "current": recent_data[-1].humidity_percent,
                 "min": min(humidity),
                 "max": max(humidity),
-                "avg": round(sum(humidity) / len(humidity), 1)
+                "avg": round(sum(humidity) / count, 1)
             },
             "precipitation": {
                 "total": round(sum(precipitation), 2),
                 "max_hourly": max(precipitation),
-                "hours_with_precip": len([p for p in precipitation if p > 0])
+                "hours_with_precip": count - precipitation.count(0)
             },
             "wind": {
                 "current_speed": recent_data[-1].wind_speed_mph,
                 "current_direction": recent_data[-1].wind_direction,
                 "max_speed": max(wind_speeds),
-                "avg_speed": round(sum(wind_speeds) / len(wind_speeds), 1)
+                "avg_speed": round(sum(wind_speeds) / count, 1)
             },
             "conditions": {
                 "current": recent_data[-1].conditions,
@@ -710,13 +781,34 @@ class WeatherMonitoringAgent(BaseAgent):
         
         return analysis
     
+    @property
+    def weather_data(self) -> List[WeatherReading]:
+        """Reading history, oldest first"""
+        return self._weather_data
+    
+    @weather_data.setter
+    def weather_data(self, readings: List[WeatherReading]):
+        # Cached analyses were computed from the readings being replaced
+        self._weather_data = readings
+        self._analysis_cache.clear()
+    
+    def _record_reading(self, reading: WeatherReading):
+        """Add a reading to the history, keeping it in timestamp order
+        
+        NOAA readings carry the observation time, which lags the simulator's
+        "now" stamps, so a new reading is not always the newest one.
+        """
+        bisect.insort(self.weather_data, reading, key=_reading_epoch)
+    
+    def _readings_since(self, hours_back: float) -> List[WeatherReading]:
+        """Readings newer than hours_back hours ago, found by bisecting the chronological history"""
+        cutoff_time = time.time() - hours_back * 3600
+        start = bisect.bisect_right(self.weather_data, cutoff_time, key=_reading_epoch)
+        return self.weather_data[start:]
+    
     def _get_conditions_summary(self, data: List[WeatherReading]) -> Dict[str, int]:
         """Get summary of weather conditions frequency"""
-        conditions_count = {}
-        for reading in data:
-            condition = reading.conditions
-            conditions_count[condition] = conditions_count.get(condition, 0) + 1
-        return conditions_count
+        return dict(Counter(reading.conditions for reading in data))
     
     # NOAA Integration Helper Methods
     
@@ -878,11 +970,7 @@ class WeatherMonitoringAgent(BaseAgent):
         hours_back = message.payload.get('hours_back', 24)
         
         # Get historical data
-        cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours_back)
-        historical_data = [
-            reading.to_dict() for reading in self.weather_data
-            if datetime.fromisoformat(reading.timestamp.replace('Z', '+00:00')) > cutoff_time
-        ]
+        historical_data = [reading.to_dict() for reading in self._readings_since(hours_back)]
         
         response = CrossLanguageMessage(
             msg_id=f"history_response_{int(time.time() * 1000)}",
@@ -914,10 +1002,10 @@ class WeatherMonitoringAgent(BaseAgent):
         hours_ahead = message.payload.get('hours_ahead', 24)
         
         # Generate simulated forecast
-        forecast_data = []
-        for i in range(1, hours_ahead + 1):
-            forecast_reading = self.simulator.generate_hourly_reading(i)
-            forecast_data.append(forecast_reading.to_dict())
+        forecast_data = [
+            forecast_reading.to_dict()
+            for forecast_reading in self.simulator.generate_batch(hours_ahead, start_offset=1)
+        ]
         
         response = CrossLanguageMessage(
             msg_id=f"forecast_response_{int(time.time() * 1000)}",
@@ -1074,7 +1162,7 @@ class WeatherMonitoringAgent(BaseAgent):
                 noaa_reading = await self.noaa_service.get_current_weather(self.noaa_location)
                 if noaa_reading:
                     reading = self._convert_noaa_reading(noaa_reading)
-                    self.weather_data.append(reading)
+                    self._record_reading(reading)
                     
                     # Keep only last 7 days of data
                     if len(self.weather_data) > 168:
@@ -1149,4 +1237,4 @@ async def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    run_agent(main())
\ No newline at end of file